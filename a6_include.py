@@ -9,6 +9,13 @@
 #              are available and how they're implemented.
 #              Don't modify the contents of this file.
 
+from collections.abc import ItemsView, KeysView, MutableMapping, ValuesView
+
+try:
+    import numpy as np
+except ImportError:     # batch hashing falls back to the scalar functions
+    np = None
+
 
 # -------------- Used by both HashMaps (SC & OA)  -------------- #
 
@@ -20,26 +27,27 @@ class DynamicArray:
     """
     Class implementing a Dynamic Array
     Supported methods are:
-    append, pop, swap, get_at_index, set_at_index, length
+    append, pop, swap, get_at_index, set_at_index, length, iterator
     """
 
+    __slots__ = ('_data',)
+
     def __init__(self, arr=None) -> None:
         """Initialize new dynamic array using a list."""
         self._data = arr.copy() if arr else []
 
     def __iter__(self):
         """
-        Disable iterator capability for DynamicArray class
-        This means loops and aggregate functions like
-        those shown below won't work:
+        Return an iterator over the elements of the array, so loops
+        and aggregate functions like those shown below work:
 
         da = DynamicArray()
-        for value in da:        # will not work
-        min(da)                 # will not work
-        max(da)                 # will not work
-        sort(da)                # will not work
+        for value in da:
+        min(da)
+        max(da)
+        sorted(da)
         """
-        return None
+        return iter(self._data)
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -82,6 +90,106 @@ class DynamicArray:
         return len(self._data)
 
 
+class _ItemsView(ItemsView):
+    """View of a HashMap's key/value pairs that iterates over the HashMap's own _iter_items()"""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        """Iterate over the key/value pairs without looking each key up again."""
+        return self._mapping._iter_items()
+
+
+class _ValuesView(ValuesView):
+    """View of a HashMap's values that iterates over the HashMap's own _iter_items()"""
+
+    __slots__ = ()
+
+    def __iter__(self):
+        """Iterate over the values without looking each key up again."""
+        for _, value in self._mapping._iter_items():
+            yield value
+
+
+class HashMapMixin(MutableMapping):
+    """
+    Iteration and Python mapping protocol shared by the HashMaps. A HashMap provides _iter_items(), a generator of
+    its key/value pairs, along with put(), contains_key(), get_size(), __getitem__() and __delitem__(); everything
+    else is built on those. A HashMap's own put(), contains_key() and get_size() are installed as its __setitem__,
+    __contains__ and __len__, so [] assignment, the in operator and len() go straight to them without an extra call.
+    """
+
+    _SPECIAL_METHODS = (('__setitem__', 'put'), ('__contains__', 'contains_key'), ('__len__', 'get_size'))
+
+    # a HashMap is equal only to itself, hashable and always true, as it was before it became a Mapping; Mapping's
+    #   equality compares contents, which would leave the HashMap unhashable, and an empty Mapping is false
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Install a HashMap's put(), contains_key() and get_size() as its special methods."""
+        super().__init_subclass__(**kwargs)
+        for special, method in cls._SPECIAL_METHODS:
+            if method in vars(cls) and special not in vars(cls):
+                setattr(cls, special, vars(cls)[method])
+
+    def __bool__(self) -> bool:
+        """A HashMap is true even when it is empty."""
+        return True
+
+    def keys(self) -> KeysView:
+        """
+        Returns a view of the keys in the HashMap, in the same order as items(). The view reflects later changes to
+        the HashMap.
+
+        :param: None
+
+        :return: a view of the keys
+        """
+        return KeysView(self)
+
+    def values(self) -> ValuesView:
+        """
+        Returns a view of the values in the HashMap, in the same order as items(). The view reflects later changes
+        to the HashMap.
+
+        :param: None
+
+        :return: a view of the values
+        """
+        return _ValuesView(self)
+
+    def items(self) -> ItemsView:
+        """
+        Returns a view of the key/value pairs in the HashMap as tuples. The view reflects later changes to the
+        HashMap, and iterating over it walks the HashMap's buckets once.
+
+        :param: None
+
+        :return: a view of (key, value) tuples
+        """
+        return _ItemsView(self)
+
+    def get_keys_and_values(self) -> DynamicArray:
+        """
+        Puts all the key/value pairs of a HashMap into a Dynamic Array as a tuple, one tuple for each key/value pair.
+
+        :param: None
+
+        :return: a Dynamic Array containing tuples of the key/value pairs from the HashMap
+        """
+        key_val = DynamicArray()
+        for pair in self._iter_items():
+            key_val.append(pair)
+
+        return key_val
+
+    def __iter__(self):
+        """Iterate over the keys of the HashMap."""
+        for key, _ in self._iter_items():
+            yield key
+
+
 def hash_function_1(key: str) -> int:
     """Sample Hash function #1 to be used with HashMap implementation"""
     hash = 0
@@ -100,6 +208,138 @@ def hash_function_2(key: str) -> int:
     return hash
 
 
+def _code_points(keys: list) -> tuple:
+    """
+    Encode a list of string keys as one flat array of unicode code points, the keys one after another, along with
+    the index where each key starts and ends in it. Memory use is proportional to the total length of the keys.
+    ''.join() raises TypeError for any key that is not a str, so a key the scalar functions reject is not quietly
+    hashed as its string form instead.
+    """
+    codes = np.frombuffer(''.join(keys).encode('utf-32-le', 'surrogatepass'), dtype=np.uint32).astype(np.int64)
+    lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+    ends = np.cumsum(lengths)
+    return codes, ends - lengths, ends
+
+
+def _key_sums(values, starts, ends):
+    """
+    Sum a flat array over each key's range of indexes, using the difference of two running totals. The running
+    total may wrap around in int64, but the difference for each key is still exact.
+    """
+    totals = np.concatenate((np.zeros(1, dtype=np.int64), np.cumsum(values)))
+    return totals[ends] - totals[starts]
+
+
+def hash_function_1_batch(keys: DynamicArray) -> DynamicArray:
+    """Batch version of hash_function_1, returns an array of hashes in the same order as keys"""
+    if np is None or keys.length() == 0:
+        return DynamicArray([hash_function_1(keys[i]) for i in range(keys.length())])
+
+    codes, starts, ends = _code_points(keys._data)
+    return DynamicArray(_key_sums(codes, starts, ends).tolist())
+
+
+def hash_function_2_batch(keys: DynamicArray) -> DynamicArray:
+    """Batch version of hash_function_2, returns an array of hashes in the same order as keys"""
+    if np is None or keys.length() == 0:
+        return DynamicArray([hash_function_2(keys[i]) for i in range(keys.length())])
+
+    # each code point is weighted by its 1-based position within its own key
+    codes, starts, ends = _code_points(keys._data)
+    positions = np.arange(1, codes.size + 1, dtype=np.int64) - np.repeat(starts, ends - starts)
+    return DynamicArray(_key_sums(codes * positions, starts, ends).tolist())
+
+
+BATCH_HASH_FUNCTIONS = {
+    hash_function_1: hash_function_1_batch,
+    hash_function_2: hash_function_2_batch,
+}
+
+
+def hash_batch(function: callable, keys: DynamicArray) -> DynamicArray:
+    """
+    Hash every key in the array with the given hash function in one call.
+    Uses the vectorized version of the function when one is registered, otherwise hashes one key at a time.
+    """
+    batch_function = BATCH_HASH_FUNCTIONS.get(function)
+    if batch_function is not None:
+        return batch_function(keys)
+    return DynamicArray([function(keys[i]) for i in range(keys.length())])
+
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def mix_hash(hash: int, seed: int = 0) -> int:
+    """
+    Seeded 64-bit mixer (the splitmix64 finalizer) used to spread the bits of a hash before it picks a bucket,
+    so the same key lands somewhere else once the seed changes.
+    """
+    x = (hash ^ (seed * 0x9E3779B97F4A7C15)) & _HASH_MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _HASH_MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _HASH_MASK
+    return x ^ (x >> 31)
+
+
+def fibonacci_hash(hash: int, capacity: int) -> int:
+    """
+    Pick a bucket in a power-of-two table by multiplying the hash by 2^64 divided by the golden ratio and keeping
+    the top bits of the 64-bit product, so every bit of the hash affects the bucket
+    """
+    return ((hash * 0x9E3779B97F4A7C15) & _HASH_MASK) >> (65 - capacity.bit_length())
+
+
+# primes used to rule out most composite numbers before a Miller-Rabin test, testing against the first 12 of them as
+#   bases gives the exact answer for every number below 3.3 * 10^24
+_SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+
+def is_prime(number: int) -> bool:
+    """Determine if given integer is a prime number, in a fixed number of steps instead of trial division"""
+    if number < 2:
+        return False
+    for prime in _SMALL_PRIMES:
+        if number % prime == 0:
+            return number == prime
+
+    # write number - 1 as odd * 2^twos, then run one Miller-Rabin round per base
+    odd, twos = number - 1, 0
+    while odd % 2 == 0:
+        odd, twos = odd // 2, twos + 1
+
+    for base in _SMALL_PRIMES[:12]:
+        x = pow(base, odd, number)
+        if x == 1 or x == number - 1:
+            continue
+        for _ in range(twos - 1):
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def next_prime(capacity: int) -> int:
+    """
+    Return the capacity if it is prime, otherwise the closest odd prime larger than it, the same capacity the
+    HashMaps' resize_table() picks with their own _is_prime/_next_prime pair. Their constructors call _next_prime
+    alone, which also moves 2 on to 3, so pass capacity | 1 to start out at the same capacity as they do
+    """
+    if capacity == 2 or is_prime(capacity):
+        return capacity
+    if capacity % 2 == 0:
+        capacity += 1
+    while not is_prime(capacity):
+        capacity += 2
+    return capacity
+
+
+def next_power_of_two(capacity: int) -> int:
+    """Return the smallest power of two that is at least the given capacity"""
+    return 1 << max(capacity - 1, 0).bit_length()
+
+
 # --------- For use in Separate Chaining (SC) HashMap  --------- #
 
 class SLNode:
@@ -107,11 +347,14 @@ class SLNode:
     Singly Linked List node for use in a hash map
     """
 
-    def __init__(self, key: str, value: object, next: "SLNode" = None) -> None:
-        """Initialize node given a key and value."""
+    __slots__ = ('key', 'value', 'next', 'hash')
+
+    def __init__(self, key: str, value: object, next: "SLNode" = None, hash: int = None) -> None:
+        """Initialize node given a key and value, and optionally the full hash of the key."""
         self.key = key
         self.value = value
         self.next = next
+        self.hash = hash
 
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
@@ -123,6 +366,8 @@ class LinkedListIterator:
     Separate iterator class for LinkedList
     """
 
+    __slots__ = ('_node',)
+
     def __init__(self, current_node: SLNode) -> None:
         """Initialize the iterator with a node."""
         self._node = current_node
@@ -145,9 +390,11 @@ class LinkedListIterator:
 class LinkedList:
     """
     Class implementing a Singly Linked List
-    Supported methods are: insert, remove, contains, length, iterator
+    Supported methods are: insert, insert_node, upsert, remove, contains, length, iterator
     """
 
+    __slots__ = ('_head', '_size')
+
     def __init__(self) -> None:
         """
         Initialize new linked list;
@@ -172,20 +419,45 @@ class LinkedList:
         """Return an iterator for the list, starting at the head."""
         return LinkedListIterator(self._head)
 
-    def insert(self, key: str, value: object) -> None:
-        """Insert new node at front of the list."""
-        self._head = SLNode(key, value, self._head)
+    def insert(self, key: str, value: object, hash: int = None) -> None:
+        """Insert new node at front of the list, storing the key's hash if given."""
+        self._head = SLNode(key, value, self._head, hash)
         self._size += 1
 
-    def remove(self, key: str) -> bool:
+    def insert_node(self, node: SLNode) -> None:
+        """Link an existing node in at the front of the list."""
+        node.next = self._head
+        self._head = node
+        self._size += 1
+
+    def upsert(self, key: str, value: object, hash: int = None) -> bool:
+        """
+        Update the value of the node with matching key, or insert a new node at the front of the list if there is
+        no match, in a single walk of the list.
+        If a hash is given, only nodes storing that hash have their key compared, and a new node stores it.
+        Return True if a new node was inserted, False if an existing node was updated.
+        """
+        node = self._head
+        while node:
+            if (hash is None or node.hash == hash) and node.key == key:
+                node.value = value
+                return False
+            node = node.next
+
+        self._head = SLNode(key, value, self._head, hash)
+        self._size += 1
+        return True
+
+    def remove(self, key: str, hash: int = None) -> bool:
         """
         Remove first node with matching key.
+        If a hash is given, only nodes storing that hash have their key compared.
         Return True if removal was successful, False otherwise.
         """
         previous, node = None, self._head
         while node:
 
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 if previous:
                     previous.next = node.next
                 else:
@@ -196,11 +468,14 @@ class LinkedList:
             previous, node = node, node.next
         return False
 
-    def contains(self, key: str) -> SLNode:
-        """Return node with matching key, or None if no match"""
+    def contains(self, key: str, hash: int = None) -> SLNode:
+        """
+        Return node with matching key, or None if no match.
+        If a hash is given, only nodes storing that hash have their key compared.
+        """
         node = self._head
         while node:
-            if node.key == key:
+            if (hash is None or node.hash == hash) and node.key == key:
                 return node
             node = node.next
         return node
@@ -214,10 +489,13 @@ class LinkedList:
 
 class HashEntry:
 
-    def __init__(self, key: str, value: object) -> None:
-        """Initialize an entry for use in a hash map."""
+    __slots__ = ('key', 'value', 'is_tombstone', 'hash')
+
+    def __init__(self, key: str, value: object, hash: int = None) -> None:
+        """Initialize an entry for use in a hash map, optionally storing the full hash of the key."""
         self.key = key
         self.value = value
+        self.hash = hash
 
         # Set this value to True when you "delete" a HashEntry
         self.is_tombstone = False
@@ -225,3 +503,78 @@ class HashEntry:
     def __str__(self) -> str:
         """Override string method to provide more readable output."""
         return f"K: {self.key} V: {self.value} TS: {self.is_tombstone}"
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import tracemalloc
+
+    # the HashMaps import this file as a6_include, so the classes are measured and swapped out in that module
+    import a6_include
+    import hash_map_oa
+    import hash_map_sc
+    from hash_functions import fnv1a
+
+    count = 200_000
+
+    def without_slots(cls):
+        """Return a copy of a class with the same methods but no __slots__, so its instances get a __dict__."""
+        return type(cls.__name__, (), {name: attribute for name, attribute in vars(cls).items()
+                                       if name != '__slots__' and name not in cls.__slots__})
+
+    def traced_bytes(build) -> int:
+        """Return the memory still allocated by build() once it returns, keeping its result alive until then."""
+        tracemalloc.start()
+        result = build()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        return memory
+
+    instances = (
+        ('SLNode', lambda cls: [cls('key', 1, None) for _ in range(count)]),
+        ('HashEntry', lambda cls: [cls('key', 1) for _ in range(count)]),
+        ('LinkedList', lambda cls: [cls() for _ in range(count)]),
+        ('LinkedListIterator', lambda cls: [cls(None) for _ in range(count)]),
+        ('DynamicArray', lambda cls: [cls() for _ in range(count)]),
+    )
+
+    # the list holding the instances is not part of their size
+    list_bytes = traced_bytes(lambda: [None for _ in range(count)])
+
+    print(f"bytes per instance, {count} instances, without and with __slots__")
+    for name, build in instances:
+        slotted = getattr(a6_include, name)
+        before = (traced_bytes(lambda: build(without_slots(slotted))) - list_bytes) / count
+        after = (traced_bytes(lambda: build(slotted)) - list_bytes) / count
+        print(f"{name:>18}: {before:6.1f} -> {after:6.1f}")
+
+    pairs = [(f"k{i}", i) for i in range(count)]
+
+    def build_map(module):
+        """Put count short string keys into a new HashMap of the given module, one put() at a time."""
+        hash_map = module.HashMap(11, fnv1a)
+        if module is hash_map_sc:
+            # separate chaining HashMaps only grow on their own once load factor limits are set
+            hash_map.set_load_factor_limits(1.0)
+        for key, value in pairs:
+            hash_map.put(key, value)
+        return hash_map
+
+    # the keys and values exist before the HashMap does, so only the HashMap's own memory is traced
+    print(f"\nbytes per entry, {count} put() calls, without and with __slots__")
+    swapped = {a6_include: ('SLNode', 'LinkedList', 'DynamicArray', 'HashEntry'),
+               hash_map_oa: ('DynamicArray', 'HashEntry'), hash_map_sc: ('DynamicArray', 'LinkedList', 'SLNode')}
+    slotted_classes = {name: getattr(a6_include, name) for name in swapped[a6_include]}
+    for name, module in (("separate chaining", hash_map_sc), ("open addressing", hash_map_oa)):
+        for target, names in swapped.items():
+            for class_name in names:
+                setattr(target, class_name, without_slots(slotted_classes[class_name]))
+        before = traced_bytes(lambda: build_map(module)) / count
+
+        for target, names in swapped.items():
+            for class_name in names:
+                setattr(target, class_name, slotted_classes[class_name])
+        after = traced_bytes(lambda: build_map(module)) / count
+        print(f"{name:>18}: {before:6.1f} -> {after:6.1f}")
@@ -0,0 +1,239 @@
+# Description: This file contains a registry of seeded hash functions that can be used with any of the HashMap
+#               classes in place of hash_function_1 and hash_function_2: the built-in hash(), 64-bit FNV-1a, XXH64
+#               and SipHash-2-4. get_hash_function() looks a function up by name and binds a seed to it, and the
+#               result is passed to a HashMap constructor like any other hash function. Running this file
+#               benchmarks every registered function on a few key corpora, reporting separate chaining chain
+#               lengths, open addressing probe lengths and hashing throughput.
+
+
+from functools import partial
+
+from a6_include import hash_function_1, hash_function_2
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _key_bytes(key) -> bytes:
+    """Encode a key as bytes for the byte-oriented hash functions."""
+    if isinstance(key, str):
+        return key.encode('utf-8')
+    if isinstance(key, (bytes, bytearray)):
+        return bytes(key)
+    return repr(key).encode('utf-8')
+
+
+def _rotl(x: int, bits: int) -> int:
+    """Rotate a 64-bit integer left by the given number of bits."""
+    return ((x << bits) | (x >> (64 - bits))) & _MASK_64
+
+
+def builtin_hash(key, seed: int = 0) -> int:
+    """Hash a key with Python's built-in hash(), hashing it together with the seed if one is given"""
+    return hash((seed, key)) if seed else hash(key)
+
+
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+
+
+def fnv1a(key, seed: int = 0) -> int:
+    """64-bit FNV-1a hash of a key, the seed is mixed into the offset basis"""
+    hash = (_FNV_OFFSET ^ seed) & _MASK_64
+    for byte in _key_bytes(key):
+        hash = ((hash ^ byte) * _FNV_PRIME) & _MASK_64
+    return hash
+
+
+_XXH_PRIME_1 = 0x9E3779B185EBCA87
+_XXH_PRIME_2 = 0xC2B2AE3D27D4EB4F
+_XXH_PRIME_3 = 0x165667B19E3779F9
+_XXH_PRIME_4 = 0x85EBCA77C2B2AE63
+_XXH_PRIME_5 = 0x27D4EB2F165667C5
+
+
+def _xxh_round(accumulator: int, lane: int) -> int:
+    """Fold one 8-byte lane into an XXH64 accumulator."""
+    accumulator = (accumulator + lane * _XXH_PRIME_2) & _MASK_64
+    return (_rotl(accumulator, 31) * _XXH_PRIME_1) & _MASK_64
+
+
+def xxhash64(key, seed: int = 0) -> int:
+    """XXH64 hash of a key with the given seed"""
+    data = _key_bytes(key)
+    length, offset = len(data), 0
+    seed &= _MASK_64
+
+    if length >= 32:
+        accumulators = [(seed + _XXH_PRIME_1 + _XXH_PRIME_2) & _MASK_64, (seed + _XXH_PRIME_2) & _MASK_64,
+                        seed, (seed - _XXH_PRIME_1) & _MASK_64]
+        while offset + 32 <= length:
+            for lane in range(4):
+                value = int.from_bytes(data[offset:offset + 8], 'little')
+                accumulators[lane] = _xxh_round(accumulators[lane], value)
+                offset += 8
+
+        hash = (_rotl(accumulators[0], 1) + _rotl(accumulators[1], 7) +
+                _rotl(accumulators[2], 12) + _rotl(accumulators[3], 18)) & _MASK_64
+        for accumulator in accumulators:
+            hash ^= _xxh_round(0, accumulator)
+            hash = (hash * _XXH_PRIME_1 + _XXH_PRIME_4) & _MASK_64
+    else:
+        hash = (seed + _XXH_PRIME_5) & _MASK_64
+
+    hash = (hash + length) & _MASK_64
+
+    while offset + 8 <= length:
+        hash ^= _xxh_round(0, int.from_bytes(data[offset:offset + 8], 'little'))
+        hash = (_rotl(hash, 27) * _XXH_PRIME_1 + _XXH_PRIME_4) & _MASK_64
+        offset += 8
+
+    if offset + 4 <= length:
+        hash ^= (int.from_bytes(data[offset:offset + 4], 'little') * _XXH_PRIME_1) & _MASK_64
+        hash = (_rotl(hash, 23) * _XXH_PRIME_2 + _XXH_PRIME_3) & _MASK_64
+        offset += 4
+
+    while offset < length:
+        hash ^= (data[offset] * _XXH_PRIME_5) & _MASK_64
+        hash = (_rotl(hash, 11) * _XXH_PRIME_1) & _MASK_64
+        offset += 1
+
+    hash ^= hash >> 33
+    hash = (hash * _XXH_PRIME_2) & _MASK_64
+    hash ^= hash >> 29
+    hash = (hash * _XXH_PRIME_3) & _MASK_64
+    return hash ^ (hash >> 32)
+
+
+def _sip_rounds(v0: int, v1: int, v2: int, v3: int, rounds: int) -> tuple:
+    """Apply the given number of SipRounds to the SipHash state."""
+    for _ in range(rounds):
+        v0 = (v0 + v1) & _MASK_64
+        v1 = _rotl(v1, 13) ^ v0
+        v0 = _rotl(v0, 32)
+        v2 = (v2 + v3) & _MASK_64
+        v3 = _rotl(v3, 16) ^ v2
+        v0 = (v0 + v3) & _MASK_64
+        v3 = _rotl(v3, 21) ^ v0
+        v2 = (v2 + v1) & _MASK_64
+        v1 = _rotl(v1, 17) ^ v2
+        v2 = _rotl(v2, 32)
+    return v0, v1, v2, v3
+
+
+def siphash24(key, seed: int = 0) -> int:
+    """SipHash-2-4 of a key, the low and high 64 bits of the seed are the two halves of the 128-bit SipHash key"""
+    data = _key_bytes(key)
+    k0, k1 = seed & _MASK_64, (seed >> 64) & _MASK_64
+    v0, v1 = k0 ^ 0x736F6D6570736575, k1 ^ 0x646F72616E646F6D
+    v2, v3 = k0 ^ 0x6C7967656E657261, k1 ^ 0x7465646279746573
+
+    # the final block holds the leftover bytes, with the low byte of the length in its top byte
+    tail = len(data) - len(data) % 8
+    blocks = [int.from_bytes(data[offset:offset + 8], 'little') for offset in range(0, tail, 8)]
+    blocks.append(int.from_bytes(data[tail:], 'little') | ((len(data) & 0xFF) << 56))
+
+    for block in blocks:
+        v3 ^= block
+        v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 2)
+        v0 ^= block
+
+    v2 ^= 0xFF
+    v0, v1, v2, v3 = _sip_rounds(v0, v1, v2, v3, 4)
+    return v0 ^ v1 ^ v2 ^ v3
+
+
+# every hash function that can be selected by name, the provided functions do not take a seed
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'builtin': builtin_hash,
+    'fnv1a': fnv1a,
+    'xxhash64': xxhash64,
+    'siphash24': siphash24,
+}
+
+_UNSEEDED = (hash_function_1, hash_function_2)
+
+
+def get_hash_function(name: str, seed: int = 0):
+    """
+    Return the registered hash function with the given name, with the seed bound to it if one is given.
+    The result takes a single key, so it can be passed to any HashMap constructor.
+    """
+    if name not in HASH_FUNCTIONS:
+        raise ValueError(f"unknown hash function {name!r}, expected one of {', '.join(HASH_FUNCTIONS)}")
+
+    function = HASH_FUNCTIONS[name]
+    if not seed:
+        return function
+    if function in _UNSEEDED:
+        raise ValueError(f"hash function {name!r} does not take a seed")
+    return partial(function, seed=seed)
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import random
+    import sys
+    from itertools import islice, permutations
+    from time import perf_counter
+
+    import hash_map_oa
+    import hash_map_sc
+
+    def percentile(values: list, fraction: float) -> int:
+        """Return the value at the given fraction of a sorted list."""
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def chain_lengths(function, keys: list) -> list:
+        """Sorted lengths of the non-empty chains of a separate chaining map with one bucket per key."""
+        m = hash_map_sc.HashMap(len(keys), function)
+        for key in keys:
+            m.put(key, None)
+        lengths = [m._buckets[i].length() for i in range(m.get_capacity())]
+        return sorted(length for length in lengths if length)
+
+    def probe_lengths(function, keys: list) -> list:
+        """Sorted number of buckets past the first one that a lookup of each key probes in an open addressing map."""
+        m = hash_map_oa.HashMap(2 * len(keys), function)
+        for key in keys:
+            m.put(key, None)
+
+        lengths = []
+        for key in keys:
+            initial, quad_probe = function(key) % m.get_capacity(), 0
+            while m._buckets[(initial + quad_probe ** 2) % m.get_capacity()].key != key:
+                quad_probe += 1
+            lengths.append(quad_probe)
+        return sorted(lengths)
+
+    # the provided functions collide so heavily that the maps become slow past a few thousand keys
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    generator = random.Random(261)
+    corpora = {
+        'shared prefix': [f"customer:eu-west-1:{i:08d}" for i in range(size)],
+        'url paths': [f"/api/v2/accounts/{i % 97}/orders/{i}" for i in range(size)],
+        'anagrams': [''.join(letters) for letters in islice(permutations('abcdefghij'), size)],
+        'random words': [''.join(generator.choices('abcdefghijklmnopqrstuvwxyz', k=generator.randint(3, 12)))
+                         for _ in range(size)],
+    }
+
+    for corpus, keys in corpora.items():
+        keys = list(dict.fromkeys(keys))
+        print(f"\n{corpus} ({len(keys)} keys)")
+        print(f"{'function':<16}{'keys/ms':>10}{'distinct':>10}"
+              f"{'chain mean':>12}{'p99':>6}{'max':>6}{'probe mean':>12}{'p99':>6}{'max':>6}")
+
+        for name in HASH_FUNCTIONS:
+            function = get_hash_function(name)
+
+            start = perf_counter()
+            hashes = [function(key) for key in keys]
+            rate = len(keys) / ((perf_counter() - start) * 1000)
+
+            chains, probes = chain_lengths(function, keys), probe_lengths(function, keys)
+            print(f"{name:<16}{rate:>10.0f}{len(set(hashes)):>10}"
+                  f"{sum(chains) / len(chains):>12.2f}{percentile(chains, 0.99):>6}{chains[-1]:>6}"
+                  f"{sum(probes) / len(probes):>12.2f}{percentile(probes, 0.99):>6}{probes[-1]:>6}")
@@ -0,0 +1,210 @@
+# Description: This file contains an asyncio facade over the Open Addressing and Separate Chaining HashMaps. The
+#               wrapped HashMap is switched to incremental resizing, so a put() that grows the table only allocates
+#               the new bucket array, and a background task on the event loop migrates the old buckets a chunk at a
+#               time, yielding to the loop after every chunk. Lookups keep working during the migration, since the
+#               wrapped HashMap checks both bucket arrays until it is done. Everything runs on the event loop's
+#               thread, so no locking is needed. Running this file measures the longest event loop stall while a
+#               table grows, with and without the facade.
+
+
+import asyncio
+
+from a6_include import DynamicArray
+
+
+class HashMap:
+    def __init__(self, hash_map, buckets_per_yield: int = 1024, buckets_per_operation: int = 4) -> None:
+        """
+        Initialize new asyncio facade over an open addressing or separate chaining HashMap. Resizes are migrated by
+        a background task that moves buckets_per_yield old buckets between yields to the event loop, and every
+        operation also migrates buckets_per_operation old buckets itself, so a busy caller helps the resize along.
+        """
+        self._map = hash_map
+        self._buckets_per_yield = max(buckets_per_yield, 1)
+        self._migration = None
+
+        hash_map.set_incremental_resize(max(buckets_per_operation, 1))
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Return the load factor of the wrapped HashMap
+        """
+        return self._map.table_load()
+
+    def is_resizing(self) -> bool:
+        """
+        Return True if old buckets of a resize are still waiting to be migrated
+        """
+        return self._migration is not None
+
+    # ------------------------------------------------------------------ #
+
+    def _start_migration(self) -> None:
+        """
+        Starts the background task that finishes a resize, if the last operation left one in progress and the task
+        is not already running.
+        """
+        if self._migration is None and self._map.resize_step(0):
+            self._migration = asyncio.get_running_loop().create_task(self._migrate())
+
+    async def _migrate(self) -> None:
+        """
+        Background task: migrates the old buckets of a resize one chunk at a time, yielding to the event loop after
+        every chunk so other tasks keep running. If the chunk migrated by the operations in between starts another
+        resize, that one is migrated too.
+        """
+        try:
+            while self._map.resize_step(self._buckets_per_yield):
+                await asyncio.sleep(0)
+        finally:
+            self._migration = None
+
+    async def finish_resize(self) -> None:
+        """
+        Waits until every old bucket of a resize in progress has been migrated.
+
+        :param: None
+
+        :return: no return value
+        """
+        while self._migration is not None:
+            await asyncio.shield(self._migration)
+
+    async def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in the HashMap. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. A resize
+        started by the put is migrated in the background.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        self._map.put(key, value)
+        self._start_migration()
+
+    async def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch, passing buckets_per_yield pairs at a time to the wrapped
+        HashMap and yielding to the event loop between them.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        for start in range(0, pairs.length(), self._buckets_per_yield):
+            stop = min(start + self._buckets_per_yield, pairs.length())
+            self._map.put_many(DynamicArray([pairs[index] for index in range(start, stop)]))
+            self._start_migration()
+            await asyncio.sleep(0)
+
+    async def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        return self._map.get(key, default)
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._map.contains_key(key)
+
+    async def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key. A resize started by the remove, such as
+        a separate chaining HashMap shrinking under its load factor limits, is migrated in the background.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._map.remove(key)
+        self._start_migration()
+
+    def __len__(self) -> int:
+        """Return the number of key/value pairs using len()."""
+        return self._map.get_size()
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+
+    import hash_map_oa
+    import hash_map_sc
+    from hash_functions import fnv1a
+
+    count = 200_000
+    keys = [f"session:{i:08d}" for i in range(count)]
+
+    async def longest_stall(task) -> float:
+        """Run a task next to a ticker that yields every millisecond, and return the longest gap between ticks."""
+        stall = 0.0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal stall
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                stall, last = max(stall, now - last), now
+
+        ticking = asyncio.get_running_loop().create_task(ticker())
+        await task
+        done.set()
+        await ticking
+        return stall
+
+    async def put_directly(hash_map) -> None:
+        """Put every key into a plain HashMap, yielding to the loop every 100 puts like a busy service would."""
+        for index, key in enumerate(keys):
+            hash_map.put(key, index)
+            if index % 100 == 0:
+                await asyncio.sleep(0)
+
+    async def put_through_facade(hash_map) -> None:
+        """Put every key through the facade, yielding to the loop every 100 puts."""
+        facade = HashMap(hash_map)
+        for index, key in enumerate(keys):
+            await facade.put(key, index)
+            if index % 100 == 0:
+                await asyncio.sleep(0)
+        await facade.finish_resize()
+        assert facade.get_size() == count and await facade.get(keys[-1]) == count - 1
+
+    def chaining(hash_map):
+        """Separate chaining HashMaps only grow on their own once load factor limits are set."""
+        hash_map.set_load_factor_limits(1.0)
+        return hash_map
+
+    print(f"{count} puts, hashed with fnv1a, longest event loop stall")
+    for name, make in (("open addressing", lambda: hash_map_oa.HashMap(11, fnv1a)),
+                       ("separate chaining", lambda: chaining(hash_map_sc.HashMap(11, fnv1a)))):
+        direct = asyncio.run(longest_stall(put_directly(make())))
+        facade = asyncio.run(longest_stall(put_through_facade(make())))
+        print(f"{name:>18}: direct {direct * 1000:7.1f} ms, facade {facade * 1000:7.1f} ms")
@@ -0,0 +1,422 @@
+# Description: This file contains a bounded cache built on the Separate Chaining HashMap. The HashMap maps each key
+#               to a cache entry, and the entries are threaded onto a doubly linked list in order of use, so a hit
+#               moves its entry to the front and a full cache evicts the entry at the back, both in O(1). Optional
+#               TinyLFU admission keeps a compact count-min sketch of how often keys are requested, and only lets a
+#               new key push out the least recently used entry if the new key is requested more often. Entries can
+#               expire after a time to live. The memoize decorator caches the results of a function in a Cache.
+#               Running this file compares hit ratios on a skewed workload.
+
+
+import time
+from collections import namedtuple
+from functools import update_wrapper
+
+import hash_map_sc
+from a6_include import HashMapMixin, hash_function_1, mix_hash, next_power_of_two
+
+
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'expirations', 'rejections'])
+
+# every count-min sketch counter halved at once, see FrequencySketch.increment()
+_HALVE = bytes(count >> 1 for count in range(256))
+
+# marks a missing value, since None can be a cached value
+_MISSING = object()
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of how often keys have been seen, used for TinyLFU admission. Each key has one saturating
+    counter in each of four rows, and its estimated count is the smallest of the four. Once the number of increments
+    reaches ten times the cache size, every counter is halved, so the counts favour recent requests.
+    """
+
+    __slots__ = ('_counters', '_mask', '_additions', '_sample_size')
+
+    ROWS = 4
+    MAX_COUNT = 15
+
+    def __init__(self, size: int) -> None:
+        """Initialize a sketch with enough counters to track a cache of the given size."""
+        width = next_power_of_two(max(size, 16))
+        self._counters = bytearray(self.ROWS * width)
+        self._mask = width - 1
+        self._additions = 0
+        self._sample_size = 10 * max(size, 1)
+
+    def _indexes(self, hash: int):
+        """Yield the counter of a hash in each row, picked by double hashing one mixed hash."""
+        mixed = mix_hash(hash)
+        first, step = mixed & 0xFFFFFFFF, (mixed >> 32) | 1
+        for row in range(self.ROWS):
+            yield row * (self._mask + 1) + ((first + row * step) & self._mask)
+
+    def increment(self, hash: int) -> None:
+        """Count one more request for the key with this hash."""
+        counters = self._counters
+        for index in self._indexes(hash):
+            if counters[index] < self.MAX_COUNT:
+                counters[index] += 1
+
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._counters = counters.translate(_HALVE)
+            self._additions //= 2
+
+    def estimate(self, hash: int) -> int:
+        """Return the estimated number of requests for the key with this hash."""
+        return min(self._counters[index] for index in self._indexes(hash))
+
+    def clear(self) -> None:
+        """Forget every count."""
+        self._counters = bytearray(len(self._counters))
+        self._additions = 0
+
+
+class _CacheEntry:
+    """
+    Cache entry stored as the value in the HashMap, linked to its neighbours in the recency list
+    """
+
+    __slots__ = ('key', 'value', 'expires', 'prev', 'next')
+
+    def __init__(self, key: str, value: object, expires: float = None) -> None:
+        """Initialize an entry, unlinked, that expires at the given time (None for never)."""
+        self.key = key
+        self.value = value
+        self.expires = expires
+        self.prev = self.next = self
+
+
+class Cache(HashMapMixin):
+    def __init__(self, maxsize: int, function=hash_function_1, ttl: float = None, admission: str = None,
+                 timer=time.monotonic) -> None:
+        """
+        Initialize new cache that holds at most maxsize entries, evicting the least recently used entry to make
+        room. If ttl is given, entries expire that many seconds after they were last put. admission can be
+        'tinylfu' to only admit a new key over the least recently used entry if it has been requested more often.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if admission not in (None, 'tinylfu'):
+            raise ValueError(f"unknown admission policy {admission!r}")
+
+        # the HashMap is sized for a full cache up front, so it never has to resize
+        self._map = hash_map_sc.HashMap(maxsize, function)
+        self._hash_function = function
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._timer = timer
+        self._sketch = FrequencySketch(maxsize) if admission == 'tinylfu' else None
+
+        # the key of the last get() that counted a request in the sketch, so a put() right after it for the same
+        #   key does not count the request twice
+        self._counted = _MISSING
+
+        # set once any entry has a time to live, so len() only looks for expired entries when there can be some
+        self._expiring = ttl is not None
+
+        # sentinel of the recency list: _root.next is the most recently used entry, _root.prev the least
+        self._root = _CacheEntry(None, None)
+
+        self._hits = self._misses = self._evictions = self._expirations = self._rejections = 0
+
+    def get_size(self) -> int:
+        """
+        Return the number of entries in the cache, including any that have expired but not been removed yet; len()
+        removes expired entries first, so it agrees with iteration
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return the maximum number of entries in the cache
+        """
+        return self._maxsize
+
+    def get_stats(self) -> CacheStats:
+        """
+        Return the hit, miss, eviction, expiration and rejection counts since the cache was created or cleared
+        """
+        return CacheStats(self._hits, self._misses, self._evictions, self._expirations, self._rejections)
+
+    # ------------------------------------------------------------------ #
+
+    def _link_front(self, entry: _CacheEntry) -> None:
+        """Link an entry in at the front of the recency list."""
+        root = self._root
+        entry.prev, entry.next = root, root.next
+        root.next.prev = entry
+        root.next = entry
+
+    @staticmethod
+    def _unlink(entry: _CacheEntry) -> None:
+        """Take an entry out of the recency list."""
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+
+    def _discard(self, entry: _CacheEntry) -> None:
+        """Remove an entry from both the recency list and the HashMap."""
+        self._unlink(entry)
+        self._map.remove(entry.key)
+
+    def _is_expired(self, entry: _CacheEntry) -> bool:
+        """Return True if an entry has a time to live that has passed."""
+        return entry.expires is not None and entry.expires <= self._timer()
+
+    def put(self, key: str, value: object, ttl: float = None) -> None:
+        """
+        Adds or updates a key/value pair and makes it the most recently used entry. If the key is new and the cache
+        is full, the least recently used entry is evicted first, unless TinyLFU admission rejects the new key, in
+        which case the pair is not cached.
+
+        :param key: the key to place or update in the cache
+        :param value: the value associated with the key
+        :param ttl: seconds until the entry expires, by default the cache's ttl
+
+        :return: no return value
+        """
+        ttl = self._ttl if ttl is None else ttl
+        expires = self._timer() + ttl if ttl is not None else None
+        if expires is not None:
+            self._expiring = True
+
+        # a put() counts as a request for the key, unless it follows the get() that already counted it
+        if self._sketch is not None:
+            if key != self._counted:
+                self._sketch.increment(self._hash_function(key))
+            self._counted = _MISSING
+
+        entry = self._map.get(key)
+        if entry is not None:
+            entry.value, entry.expires = value, expires
+            self._unlink(entry)
+            self._link_front(entry)
+            return
+
+        if self._map.get_size() >= self._maxsize:
+            victim = self._root.prev
+            if self._is_expired(victim):
+                self._expirations += 1
+            elif (self._sketch is not None
+                  and self._sketch.estimate(self._hash_function(key))
+                  <= self._sketch.estimate(self._hash_function(victim.key))):
+                self._rejections += 1
+                return
+            else:
+                self._evictions += 1
+            self._discard(victim)
+
+        entry = _CacheEntry(key, value, expires)
+        self._link_front(entry)
+        self._map.put(key, entry)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value cached for the provided key and makes it the most recently used entry. An entry whose time
+        to live has passed is removed and counts as a miss.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not cached
+
+        :return: the cached value, or default (None) if the key is not cached
+        """
+        if self._sketch is not None:
+            self._sketch.increment(self._hash_function(key))
+            self._counted = key
+
+        entry = self._map.get(key)
+        if entry is None:
+            self._misses += 1
+            return default
+
+        if self._is_expired(entry):
+            self._discard(entry)
+            self._expirations += 1
+            self._misses += 1
+            return default
+
+        self._hits += 1
+        self._unlink(entry)
+        self._link_front(entry)
+        return entry.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key is cached and has not expired, without counting a hit or miss or changing
+        which entry is the least recently used.
+
+        :param key: the key to look for in the cache
+
+        :return: True if the key is cached, False if it is not
+        """
+        entry = self._map.get(key)
+        return entry is not None and not self._is_expired(entry)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the entry for the provided key, if there is one.
+
+        :param key: the key of the entry to remove
+
+        :return: no return value
+        """
+        entry = self._map.get(key)
+        if entry is not None:
+            self._discard(entry)
+
+    def purge_expired(self) -> int:
+        """
+        Removes every entry whose time to live has passed. Expired entries are otherwise only removed when they are
+        looked up or reach the back of the recency list.
+
+        :param: None
+
+        :return: the number of entries removed
+        """
+        now = self._timer()
+        removed = 0
+        entry = self._root.next
+        while entry is not self._root:
+            following = entry.next
+            if entry.expires is not None and entry.expires <= now:
+                self._discard(entry)
+                removed += 1
+            entry = following
+
+        self._expirations += removed
+        return removed
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the counters and the frequency sketch.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._map.clear()
+        self._root.prev = self._root.next = self._root
+        if self._sketch is not None:
+            self._sketch.clear()
+            self._counted = _MISSING
+        self._hits = self._misses = self._evictions = self._expirations = self._rejections = 0
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair that has not expired as a tuple, from the most to the least recently used.
+        The cache should not be changed while the generator is in use.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        now = self._timer()
+        entry = self._root.next
+        while entry is not self._root:
+            if entry.expires is None or entry.expires > now:
+                yield entry.key, entry.value
+            entry = entry.next
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __len__(self) -> int:
+        """Return the number of entries that have not expired using len(), removing the expired ones first."""
+        if self._expiring:
+            self.purge_expired()
+        return self._map.get_size()
+
+    def __getitem__(self, key: str) -> object:
+        """Return the cached value for a key using [] syntax, raising KeyError if the key is not cached."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not cached."""
+        entry = self._map.get(key)
+        if entry is None:
+            raise KeyError(key)
+        self._discard(entry)
+
+
+def _make_key(args: tuple, kwargs: dict) -> tuple:
+    """
+    Build a cache key from the arguments of a call. Keyword arguments are sorted, so their order does not matter.
+    """
+    if kwargs:
+        return args + (_MISSING,) + tuple(sorted(kwargs.items()))
+    return args
+
+
+def memoize(maxsize=128, ttl: float = None, admission: str = None):
+    """
+    Decorator that caches the results of a function in a Cache, keyed by its arguments, which must be hashable.
+    Can be used as @memoize or @memoize(maxsize, ttl, admission). The decorated function has a cache attribute
+    holding the Cache, for its statistics or to clear it.
+
+    :param maxsize: the maximum number of results to keep
+    :param ttl: seconds until a result expires, None for never
+    :param admission: None, or 'tinylfu' for TinyLFU admission
+
+    :return: the decorator, or the decorated function when used without arguments
+    """
+    if callable(maxsize):
+        return memoize()(maxsize)
+
+    def decorator(function):
+        # argument tuples are hashed with the built-in hash(), as the HashMap's hash functions only take strings
+        cache = Cache(maxsize, hash, ttl, admission)
+
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = function(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        return update_wrapper(wrapper, function)
+
+    return decorator
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import random
+
+    # a skewed (Zipf-like) stream of 200k requests over 50k keys, with a scan of one-off keys every 1000 requests
+    rng = random.Random(7)
+    weights = [1 / rank for rank in range(1, 50_001)]
+    requests = [f"item:{key}" for key in rng.choices(range(50_000), weights, k=200_000)]
+    for start in range(0, len(requests), 1000):
+        requests[start:start + 100] = [f"scan:{start}:{offset}" for offset in range(100)]
+
+    print(f"{len(requests)} requests, hit ratio by cache size")
+    for maxsize in (500, 2000, 8000):
+        ratios = []
+        for admission in (None, 'tinylfu'):
+            cache = Cache(maxsize, admission=admission)
+            start = time.perf_counter()
+            for key in requests:
+                if cache.get(key) is None:
+                    cache.put(key, key)
+            elapsed = time.perf_counter() - start
+            stats = cache.get_stats()
+            ratios.append(f"{stats.hits / len(requests):6.1%} ({elapsed:4.2f}s)")
+
+        # the old approach: an unbounded HashMap cleared whenever it fills up
+        hash_map = hash_map_sc.HashMap(maxsize, hash_function_1)
+        hits = 0
+        for key in requests:
+            if hash_map.get(key) is None:
+                if hash_map.get_size() >= maxsize:
+                    hash_map.clear()
+                hash_map.put(key, key)
+            else:
+                hits += 1
+
+        print(f"{maxsize:>6}: LRU {ratios[0]}, TinyLFU {ratios[1]}, clear() when full {hits / len(requests):6.1%}")
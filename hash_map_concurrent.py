@@ -0,0 +1,479 @@
+# Description: This file contains a thread-safe separate chaining HashMap. Instead of one lock around the whole map,
+#               the buckets are split into stripes with one lock each, so threads writing to buckets of different
+#               stripes never wait for each other. A resize takes every stripe lock, builds a new bucket array from
+#               copies of the nodes and swaps it in with a single assignment. Because chains are only ever changed by
+#               linking a finished node in or out with one reference assignment, and a resize never touches the old
+#               chains, get() and contains_key() read without taking a lock. Running this file stress tests the map
+#               from many threads and benchmarks its throughput against a single global lock.
+
+
+import threading
+from contextlib import contextmanager
+
+from a6_include import (DynamicArray, HashMapMixin, LinkedList, next_prime,
+                        hash_function_1, hash_batch)
+
+
+class HashMap(HashMapMixin):
+    def __init__(self,
+                 capacity: int = 11,
+                 function: callable = hash_function_1,
+                 stripes: int = 16,
+                 max_load: float = 1.0) -> None:
+        """
+        Initialize new thread-safe HashMap that uses separate chaining for collision resolution, with its buckets
+        guarded by the given number of stripe locks. The capacity doubles once the table load reaches max_load.
+        """
+        self._locks = tuple(threading.Lock() for _ in range(max(stripes, 1)))
+
+        # the bucket array and its capacity are swapped together, so a reader always sees a matching pair
+        self._table = self._allocate(next_prime(capacity))
+
+        # the number of keys in the buckets of each stripe, each count is only changed under its stripe's lock
+        self._counts = [0] * len(self._locks)
+
+        self._hash_function = function
+        self._max_load = max_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as hash_map_sc.HashMap
+        """
+        buckets, capacity = self._table
+        out = ''
+        for i in range(capacity):
+            out += str(i) + ': ' + str(buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._table[1]
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _allocate(capacity: int) -> tuple:
+        """
+        Allocates an empty bucket array.
+
+        :param capacity: the number of buckets
+
+        :return: a tuple of the bucket array and its capacity
+        """
+        return DynamicArray([LinkedList() for _ in range(capacity)]), capacity
+
+    def _lock_chain(self, hash: int) -> tuple:
+        """
+        Locks the stripe that guards the bucket for a hash in the current bucket array. If a resize swaps the bucket
+        array while this thread waits for the lock, the lock is released and the bucket is looked up again.
+        The caller must release the stripe's lock.
+
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: a tuple of the key's chain and the index of the locked stripe
+        """
+        while True:
+            table = self._table
+            buckets, capacity = table
+            bucket = hash % capacity
+            stripe = bucket % len(self._locks)
+
+            self._locks[stripe].acquire()
+            if self._table is table:
+                return buckets[bucket], stripe
+            self._locks[stripe].release()
+
+    @contextmanager
+    def _all_stripes(self):
+        """
+        Holds every stripe lock, always taken in the same order so two threads doing this cannot deadlock.
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. Only the lock of
+        the key's stripe is held. If the insert brings the table load up to the maximum load factor, the capacity
+        is doubled afterwards.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed hash for the key, then grows the table if the
+        insert brought it to the maximum load factor.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: no return value
+        """
+        chain, stripe = self._lock_chain(hash)
+        try:
+            inserted = chain.upsert(key, value, hash)
+            if inserted:
+                self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+
+        # the stripe lock has to be released first, growing the table takes every stripe lock
+        if inserted:
+            table = self._table
+            if self.get_size() / table[1] >= self._max_load:
+                self._resize(table, table[1] * 2)
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = hash_batch(self._hash_function, keys)
+
+        # double the capacity until the whole batch fits under the maximum load factor, then resize once
+        table = self._table
+        capacity = table[1]
+        while (self.get_size() + keys.length()) / capacity >= self._max_load:
+            capacity *= 2
+        if capacity != table[1]:
+            self._resize(table, capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap, without taking a lock.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        node = self._find_node(key, self._hash_function(key))
+        if node is not None:
+            return node.value
+        return default
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = hash_batch(self._hash_function, keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            node = self._find_node(keys[index], hashes[index])
+            values.append(node.value if node is not None else None)
+
+        return values
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap, without taking a lock.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_node(key, self._hash_function(key)) is not None
+
+    def _find_node(self, key: str, hash: int):
+        """
+        Searches the key's chain in the current bucket array. The bucket array and its capacity are read as one
+        tuple, so the chain searched always belongs to the array the hash was reduced for.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: the node holding the key, returns None if the key is not found
+        """
+        buckets, capacity = self._table
+        return buckets[hash % capacity].contains(key, hash)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key, holding only the lock of the key's
+        stripe.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._remove_hashed(key, self._hash_function(key))
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = hash_batch(self._hash_function, keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed hash. Keys that are not in the HashMap are
+        ignored.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        chain, stripe = self._lock_chain(hash)
+        try:
+            removed = chain.remove(key, hash)
+            if removed:
+                self._counts[stripe] -= 1
+        finally:
+            self._locks[stripe].release()
+        return removed
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self.get_size() / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value. Other threads may change the
+        table while the buckets are counted.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        buckets, capacity = self._table
+        return sum(1 for bucket in range(capacity) if buckets[bucket].length() == 0)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Updates the capacity of the HashMap and re-maps existing values in the HashMap after resizing, with every
+        stripe locked. The new capacity can be larger or smaller than the current capacity.
+
+        Capacity must be a prime number, if the provided value is not prime, capacity will be adjusted
+        to the closest prime number larger than the provided value.
+
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        if new_capacity >= 1:
+            self._resize(None, new_capacity)
+
+    def _resize(self, expected: tuple, new_capacity: int) -> None:
+        """
+        Builds a new bucket array from copies of the current nodes and swaps it in, with every stripe locked. The
+        old chains are left as they are, so a lock-free reader that is still walking one finishes normally.
+
+        :param expected: the bucket array the caller decided to grow, the resize is skipped if another thread has
+            swapped it out in the meantime; None resizes whatever array is current
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        with self._all_stripes():
+            if expected is not None and self._table is not expected:
+                return
+
+            old_buckets, old_capacity = self._table
+            buckets, capacity = self._allocate(next_prime(new_capacity))
+            counts = [0] * len(self._locks)
+
+            for bucket in range(old_capacity):
+                for node in old_buckets[bucket]:
+                    new_bucket = node.hash % capacity
+                    buckets[new_bucket].insert(node.key, node.value, node.hash)
+                    counts[new_bucket % len(self._locks)] += 1
+
+            self._counts = counts
+            self._table = (buckets, capacity)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of a HashMap object. The underlying capacity of the table is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        with self._all_stripes():
+            self._counts = [0] * len(self._locks)
+            self._table = self._allocate(self._table[1])
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, without taking a lock. Pairs put or removed by other
+        threads while the generator is in use may or may not be included.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        buckets, capacity = self._table
+        for bucket in range(capacity):
+            for node in buckets[bucket]:
+                yield node.key, node.value
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        node = self._find_node(key, self._hash_function(key))
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if not self._remove_hashed(key, self._hash_function(key)):
+            raise KeyError(key)
+
+# ------------------- STRESS TEST AND BENCHMARK ------------------------ #
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    import hash_map_sc
+
+    class GlobalLockHashMap:
+        """hash_map_sc.HashMap behind a single lock, the baseline the striped map is compared with"""
+
+        def __init__(self) -> None:
+            self._lock = threading.Lock()
+            self._map = hash_map_sc.HashMap(11, hash)
+            self._map.set_load_factor_limits(1.0)
+
+        def put(self, key, value) -> None:
+            with self._lock:
+                self._map.put(key, value)
+
+        def get(self, key):
+            with self._lock:
+                return self._map.get(key)
+
+        def remove(self, key) -> None:
+            with self._lock:
+                self._map.remove(key)
+
+    def run_threads(count: int, target) -> float:
+        """Run target(thread_index) on the given number of threads at once and return the elapsed seconds."""
+        barrier = threading.Barrier(count + 1)
+
+        def worker(index: int) -> None:
+            barrier.wait()
+            target(index)
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+    gil = sys._is_gil_enabled() if hasattr(sys, '_is_gil_enabled') else True
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+
+    print("\nStress test")
+    print("-----------")
+    thread_count, keys_per_thread = 16, 3000
+    m = HashMap(3, hash, stripes=8)
+    errors = []
+
+    def stress(index: int) -> None:
+        """Insert, read back and remove a range of keys owned by this thread, and overwrite a few shared keys."""
+        generator = random.Random(index)
+        own = range(index * keys_per_thread, (index + 1) * keys_per_thread)
+        for key in own:
+            m.put(key, key * 2)
+            m.put(('shared', generator.randrange(50)), index)
+        for key in own:
+            if m.get(key) != key * 2:
+                errors.append(key)
+        for key in own:
+            if key % 2:
+                m.remove(key)
+        for key in own:
+            if (key in m) != (key % 2 == 0):
+                errors.append(key)
+
+    elapsed = run_threads(thread_count, stress)
+    expected = {key: key * 2 for key in range(thread_count * keys_per_thread) if key % 2 == 0}
+    contents = dict(m.items())
+    shared = {key: contents.pop(key) for key in list(contents) if isinstance(key, tuple)}
+
+    print(f"{thread_count} threads, {elapsed:.2f}s, capacity {m.get_capacity()}, size {m.get_size()}")
+    print("lost or wrong reads:", len(errors))
+    print("contents match:", contents == expected and len(shared) <= 50 and m.get_size() == len(contents) + len(shared))
+
+    print("\nThroughput (80% get, 15% put, 5% remove on 100k keys)")
+    print("------------------------------------------------------")
+    operations, key_space = 400_000, 100_000
+
+    for thread_count in (1, 2, 4, 8, 16):
+        results = []
+        for name, factory in (('striped', lambda: HashMap(2 * key_space, hash, stripes=64)),
+                              ('global lock', GlobalLockHashMap)):
+            target_map = factory()
+            for key in range(0, key_space, 2):
+                target_map.put(key, key)
+
+            def workload(index: int) -> None:
+                """Run this thread's share of the operations with a fixed random mix."""
+                generator = random.Random(index)
+                for _ in range(operations // thread_count):
+                    key, roll = generator.randrange(key_space), generator.random()
+                    if roll < 0.8:
+                        target_map.get(key)
+                    elif roll < 0.95:
+                        target_map.put(key, roll)
+                    else:
+                        target_map.remove(key)
+
+            results.append(f"{name} {operations / run_threads(thread_count, workload) / 1000:8.0f}k ops/s")
+        print(f"{thread_count:>2} threads: " + ", ".join(results))
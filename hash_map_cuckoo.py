@@ -0,0 +1,536 @@
+# Description: This file contains a HashMap that uses cuckoo hashing for collision resolution. Entries are kept in two
+#               bucket arrays, and every key has exactly one possible bucket in each. The two buckets come from two
+#               independent hashes of the key: a seeded hash function from the hash_functions registry, run once with
+#               each of two different seeds and passed through a mixer, since some registered functions (the built-in
+#               hash() among them) give related results for nearby seeds, and a hash function that takes no seed is
+#               combined with a seeded built-in hash of the key instead. A lookup therefore looks at no more than two
+#               buckets. Inserting into an occupied bucket kicks the current entry out to its bucket in the other array,
+#               for a bounded number of kicks; if that runs out, the entry is kept in a small stash of fixed size, and
+#               once the stash is full the table is rebuilt with new seeds, growing it if new seeds alone do not place
+#               every entry. The public methods match hash_map_oa.HashMap. Running this file times inserts of keys that
+#               are anagrams of each other.
+
+
+from functools import partial
+
+from a6_include import DynamicArray, HashMapMixin, mix_hash, next_prime
+from hash_functions import HASH_FUNCTIONS, get_hash_function
+
+
+# an insert gives up after this many kicks, and a rebuild tries this many seeds before it doubles the table
+MAX_KICKS = 64
+MAX_REBUILDS = 4
+
+# entries that could not be placed go into the stash until it holds this many, then the table is rebuilt
+STASH_SIZE = 4
+
+
+def _seedable_name(function) -> str:
+    """Return the registry name of a hash function that takes a seed, or None for any other function."""
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            try:
+                get_hash_function(name, 1)
+            except ValueError:
+                return None
+            return name
+    return None
+
+
+def _seeded_hash(function, seed: int, key) -> int:
+    """Hash a key with a function that takes no seed, together with the seed and the built-in hash of the key."""
+    return hash((seed, function(key), key))
+
+
+class CuckooEntry:
+    """
+    Entry for use in a cuckoo hash map, storing the key's hash under the seed of each bucket array
+    """
+
+    __slots__ = ('key', 'value', 'hash_1', 'hash_2')
+
+    def __init__(self, key: str, value: object, hash_1: int, hash_2: int) -> None:
+        """Initialize an entry given a key, value and the key's two hashes."""
+        self.key = key
+        self.value = value
+        self.hash_1 = hash_1
+        self.hash_2 = hash_2
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return f"K: {self.key} V: {self.value}"
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function='builtin', seed: int = 0) -> None:
+        """
+        Initialize new HashMap that uses cuckoo hashing for collision resolution. The capacity is split between
+        the two bucket arrays, each of which has a prime number of buckets. The hash function is a callable, as for
+        the other HashMaps, or its name in the hash_functions registry. Each bucket array hashes keys with its own
+        seed, so a function that takes no seed, which would give the keys it cannot tell apart the same hash under
+        every seed, is combined with the seeded built-in hash of the key.
+        """
+        if isinstance(function, str):
+            function = get_hash_function(function)
+        self._function = function
+        self._function_name = _seedable_name(function)
+        self._seed = seed
+        self._set_hash_functions()
+        self._size = 0
+
+        self._table_capacity = next_prime((capacity + 1) // 2)
+        self._tables, self._stash = self._allocate(self._table_capacity), DynamicArray()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for table in range(2):
+            for i in range(self._table_capacity):
+                out += f"{table}.{i}: {self._tables[table][i]}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the number of buckets across both arrays
+        """
+        return 2 * self._table_capacity
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _allocate(table_capacity: int) -> DynamicArray:
+        """
+        Allocates the two empty bucket arrays.
+
+        :param table_capacity: the number of buckets in each array
+
+        :return: a Dynamic Array holding the two bucket arrays
+        """
+        return DynamicArray([DynamicArray([None] * table_capacity), DynamicArray([None] * table_capacity)])
+
+    def _set_hash_functions(self) -> None:
+        """
+        Binds the hash function to the current seed of each bucket array. The two seeds are never 0, which some
+        registered functions treat as unseeded.
+        """
+        first_seed, second_seed = 2 * self._seed + 1, 2 * self._seed + 2
+        if self._function_name is None:
+            self._first_function = partial(_seeded_hash, self._function, first_seed)
+            self._second_function = partial(_seeded_hash, self._function, second_seed)
+        else:
+            self._first_function = get_hash_function(self._function_name, first_seed)
+            self._second_function = get_hash_function(self._function_name, second_seed)
+
+    def _hash_key(self, key: str) -> tuple:
+        """
+        Hashes a key under the seed of each bucket array.
+
+        :param key: the key to hash
+
+        :return: a tuple of the key's hash for the first and the second bucket array
+        """
+        return mix_hash(self._first_function(key)), mix_hash(self._second_function(key))
+
+    def _new_entry(self, key: str, value: object) -> CuckooEntry:
+        """
+        Creates an entry for a key, hashing it under the seed of each bucket array.
+
+        :param key: the key of the entry
+        :param value: the value of the entry
+
+        :return: the new entry
+        """
+        return CuckooEntry(key, value, *self._hash_key(key))
+
+    def _bucket(self, entry: CuckooEntry, table: int) -> int:
+        """
+        Determines the one bucket an entry can occupy in the given array.
+
+        :param entry: the entry to place or find
+        :param table: 0 for the first bucket array, 1 for the second
+
+        :return: the index of the entry's bucket in that array
+        """
+        return (entry.hash_2 if table else entry.hash_1) % self._table_capacity
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. If the key is
+        new and the table load has reached 0.5, the capacity is doubled before the key is added.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        self._put_entry(self._new_entry(key, value))
+
+    def _put_entry(self, entry: CuckooEntry) -> None:
+        """
+        Places or updates the key/value pair of an entry whose key has already been hashed, growing the table first
+        if the load factor has reached 0.5.
+
+        :param entry: an entry carrying the key, the value and the key's two hashes
+
+        :return: no return value
+        """
+        # if the key is already in the table, update the value associated with that key
+        current = self._find_entry(entry)
+        if current is not None:
+            current.value = entry.value
+            return
+
+        if self.table_load() >= 0.5:
+            self.resize_table(self.get_capacity() * 2)
+
+        self._size += 1
+        homeless = self._insert(entry)
+        if homeless is None:
+            return
+
+        # keep the entry that was left over in the stash while there is room, otherwise rebuild with new seeds
+        if self._stash.length() < STASH_SIZE:
+            self._stash.append(homeless)
+        else:
+            self._rebuild(self._table_capacity, homeless, reseed=True)
+
+    def _insert(self, entry: CuckooEntry) -> CuckooEntry:
+        """
+        Places an entry in its bucket in the first array, kicking out whatever entry is there to its bucket in the
+        other array, and so on, for at most MAX_KICKS moves.
+
+        :param entry: the entry to place
+
+        :return: None if every entry found a bucket, otherwise the entry that is left without one
+        """
+        table = 0
+        for _ in range(MAX_KICKS):
+            buckets = self._tables[table]
+            bucket = self._bucket(entry, table)
+
+            entry, buckets[bucket] = buckets[bucket], entry
+            if entry is None:
+                return None
+
+            table = 1 - table
+
+        return entry
+
+    def _rebuild(self, table_capacity: int, extra: CuckooEntry = None, reseed: bool = False) -> None:
+        """
+        Rebuilds both bucket arrays at the given size and places every entry again, along with one extra entry if
+        given. If more entries are left over than the stash holds, every key is hashed again with new seeds and the
+        rebuild is retried; after MAX_REBUILDS seeds in a row fail, the arrays are doubled as well.
+
+        :param table_capacity: the number of buckets in each new array
+        :param extra: an entry that is not in the table yet, but is counted in its size
+        :param reseed: True to change the seeds before the first attempt
+
+        :return: no return value
+        """
+        entries = DynamicArray([entry for entry in self._entries()])
+        if extra is not None:
+            entries.append(extra)
+
+        attempt = 0
+        while True:
+            if reseed or attempt > 0:
+                self._seed += 1
+                self._set_hash_functions()
+                for index in range(entries.length()):
+                    entry = entries[index]
+                    entry.hash_1, entry.hash_2 = self._hash_key(entry.key)
+
+            self._table_capacity = table_capacity
+            self._tables, self._stash = self._allocate(table_capacity), DynamicArray()
+            for index in range(entries.length()):
+                homeless = self._insert(entries[index])
+                if homeless is not None:
+                    self._stash.append(homeless)
+
+            if self._stash.length() <= STASH_SIZE:
+                return
+
+            attempt += 1
+            if attempt % MAX_REBUILDS == 0:
+                table_capacity = next_prime(table_capacity * 2)
+
+    def _entries(self):
+        """
+        Yields every entry in the table, from both bucket arrays and the stash.
+
+        :param: None
+
+        :return: a generator of entries
+        """
+        for table in range(2):
+            buckets = self._tables[table]
+            for bucket in range(self._table_capacity):
+                if buckets[bucket] is not None:
+                    yield buckets[bucket]
+
+        for index in range(self._stash.length()):
+            yield self._stash[index]
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+
+        # double the capacity until the whole batch fits under the 0.5 load factor, then resize once
+        capacity = self.get_capacity()
+        while (self._size + keys.length()) / capacity >= 0.5:
+            capacity *= 2
+        if capacity != self.get_capacity():
+            self.resize_table(capacity)
+
+        seed = self._seed
+        hashes_1, hashes_2 = self._hash_many(keys)
+        for index in range(keys.length()):
+            # a put that rebuilds the table with new seeds leaves the rest of the hashes out of date
+            if self._seed != seed:
+                self._put_entry(self._new_entry(keys[index], pairs[index][1]))
+            else:
+                self._put_entry(CuckooEntry(keys[index], pairs[index][1], hashes_1[index], hashes_2[index]))
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets across both arrays (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self._size / self.get_capacity()
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        return self.get_capacity() - self._size + self._stash.length()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Updates the capacity of the HashMap and re-maps existing values in the HashMap after resizing, using the
+        hashes stored in each entry. The new capacity can be larger or smaller than the current capacity, as long as
+        there is space available for all elements; it is doubled until the load factor is below 0.5.
+
+        The capacity is split between the two bucket arrays, and each must be a prime number. If half the provided
+        value is not prime, it will be adjusted to the closest prime number larger than it.
+
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        # only resize if the desired capacity is large enough to fit all existing values
+        if new_capacity < self._size:
+            return
+
+        table_capacity = next_prime((new_capacity + 1) // 2)
+        while self._size / (2 * table_capacity) >= 0.5:
+            table_capacity = next_prime(table_capacity * 2)
+
+        self._rebuild(table_capacity)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap, looking at no more than two buckets.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        entry = self._find_entry(self._new_entry(key, None))
+        if entry is not None:
+            return entry.value
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_entry(self._new_entry(key, None)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key. The bucket is simply emptied, no
+        tombstone is needed.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._remove_entry(self._new_entry(key, None))
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes_1, hashes_2 = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            entry = self._find_entry(CuckooEntry(keys[index], None, hashes_1[index], hashes_2[index]))
+            values.append(entry.value if entry is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes_1, hashes_2 = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_entry(CuckooEntry(keys[index], None, hashes_1[index], hashes_2[index]))
+
+    def _find_entry(self, probe: CuckooEntry) -> CuckooEntry:
+        """
+        Looks for the entry with the same key as the probe in its bucket in each array, then in the stash, which is
+        empty unless some insert ran out of kicks.
+
+        :param probe: an entry carrying the key and its two hashes
+
+        :return: the entry holding the key, returns None if the key is not found
+        """
+        for table in range(2):
+            entry = self._tables[table][self._bucket(probe, table)]
+            if entry is not None and entry.hash_1 == probe.hash_1 and entry.key == probe.key:
+                return entry
+
+        for index in range(self._stash.length()):
+            if self._stash[index].key == probe.key:
+                return self._stash[index]
+
+        return None
+
+    def _remove_entry(self, probe: CuckooEntry) -> bool:
+        """
+        Removes the entry with the same key as the probe, emptying its bucket or taking it out of the stash.
+
+        :param probe: an entry carrying the key and its two hashes
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        for table in range(2):
+            bucket = self._bucket(probe, table)
+            entry = self._tables[table][bucket]
+            if entry is not None and entry.hash_1 == probe.hash_1 and entry.key == probe.key:
+                self._tables[table][bucket] = None
+                self._size -= 1
+                return True
+
+        for index in range(self._stash.length()):
+            if self._stash[index].key == probe.key:
+                self._stash[index] = self._stash[self._stash.length() - 1]
+                self._stash.pop()
+                self._size -= 1
+                return True
+
+        return False
+
+    def clear(self) -> None:
+        """
+        Clears the contents of a HashMap object. The underlying capacity of the table is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._tables, self._stash = self._allocate(self._table_capacity), DynamicArray()
+        self._size = 0
+
+    def _hash_many(self, keys: DynamicArray) -> tuple:
+        """
+        Hashes a batch of keys under the seed of each bucket array.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a tuple of two Dynamic Arrays of hash values, in the same order as the keys
+        """
+        hashes = [self._hash_key(keys[index]) for index in range(keys.length())]
+        return DynamicArray([hash_1 for hash_1, _ in hashes]), DynamicArray([hash_2 for _, hash_2 in hashes])
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once. Nothing is copied, so the
+        HashMap should not be changed while the generator is in use.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        for entry in self._entries():
+            yield entry.key, entry.value
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        entry = self._find_entry(self._new_entry(key, None))
+        if entry is None:
+            raise KeyError(key)
+        return entry.value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if not self._remove_entry(self._new_entry(key, None)):
+            raise KeyError(key)
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+    from itertools import permutations
+
+    from a6_include import hash_function_1
+
+    # short keys that hash_function_1 and hash_function_2 cannot tell apart, which used to pile up in the stash
+    anagrams = ['k' + ''.join(digits) for digits in permutations('0123456789', 4)]
+
+    # hash_function_1 takes no seed, so it is combined with the seeded built-in hash and still places every key
+    for function in ('builtin', 'fnv1a', 'xxhash64', hash_function_1):
+        name = getattr(function, '__name__', function)
+        m = HashMap(11, function)
+        start = time.perf_counter()
+        for index, key in enumerate(anagrams):
+            m.put(key, index)
+        elapsed = time.perf_counter() - start
+        assert all(m.get(key) == index for index, key in enumerate(anagrams))
+        print(f"{len(anagrams)} anagram keys with {name:>15}: {elapsed:5.2f} s, stash {m._stash.length()}, "
+              f"capacity {m.get_capacity()}")
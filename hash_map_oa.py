@@ -9,11 +9,26 @@
 #               search for values in the table.
 
 
-from a6_include import (DynamicArray, HashEntry,
-                        hash_function_1, hash_function_2)
+from a6_include import (DynamicArray, HashEntry, HashMapMixin, fibonacci_hash, next_prime, next_power_of_two,
+                        hash_function_1, hash_function_2, hash_batch)
+from hash_map_snapshot import KIND_OA, open_snapshot, resolve_hash_function, write_snapshot
 
 
-class HashMap:
+class HashMap(HashMapMixin):
+    # incremental resize state, see set_incremental_resize(); the defaults mean every resize happens all at once
+    _rehash_step = 0
+    _old_buckets = None
+    _old_capacity = 0
+    _rehash_index = 0
+
+    # number of tombstones left behind by remove(), and the fraction of buckets holding either a live entry or a
+    #   tombstone at which put() compacts the table
+    _tombstones = 0
+    _compact_load = 0.75
+
+    # capacity mode, see set_power_of_two_capacity(); by default capacity is prime and probing is quadratic
+    _power_of_two = False
+
     def __init__(self, capacity: int, function) -> None:
         """
         Initialize new HashMap that uses
@@ -38,6 +53,11 @@ class HashMap:
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+
+        # old buckets of an incremental resize that have not been migrated yet are still part of the table
+        if self._old_buckets is not None:
+            for i in range(self._rehash_index, self._old_capacity):
+                out += 'old ' + str(i) + ': ' + str(self._old_buckets[i]) + '\n'
         return out
 
     def _next_prime(self, capacity: int) -> int:
@@ -93,7 +113,8 @@ class HashMap:
         """
         Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
         associated value. If the key already exists in the table, the value for the key is updated. If the table load
-        size is greater or equal to 0.5, this method first calls resize_table().
+        size is greater or equal to 0.5, this method first calls resize_table(). Otherwise, if live entries and
+        tombstones together fill too much of the table, this method first calls compact().
 
         :param key: the key to place or update in the table
         :param value: the value associated with they key being added or updated in the table
@@ -103,25 +124,57 @@ class HashMap:
         # if the load factor is greater than or equal to 0.5, resize the table before putting the new key/value pair
         if self.table_load() >= 0.5:
             self.resize_table(self._capacity*2)
+        elif (self._size + self._tombstones) / self._capacity >= self._compact_load:
+            self.compact()
+        elif self._old_buckets is not None:
+            self._rehash(self._rehash_step)
 
-        # determine bucket to insert key/value pair, if bucket is not empty, use quadratic probing to determine the
-        #   next bucket to attempt to insert
-        quad_probe = 1
-        bucket = self._hash_function(key) % self._capacity
-        while self._buckets[bucket] is not None and self._buckets[bucket].key != key and self._buckets[bucket].is_tombstone is False:
-            bucket = (self._hash_function(key) + (quad_probe**2)) % self._capacity
-            quad_probe += 1
-
-        # if the above loop stops because of it found an empty bucket or "empty" bucket
-        #   with a tombstone, insert key:value pair
-        if self._buckets[bucket] is None or self._buckets[bucket].is_tombstone is True:
-            self._buckets[bucket] = HashEntry(key, value)
-            self._size += 1
-
-        # if the loop stops because it found the key already exists in the table, update the value associated
-        #   with that key
-        else:
-            self._buckets[bucket].value = value
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed hash for the key. The table load is not checked,
+        callers are responsible for making sure there is room in the table.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: no return value
+        """
+        # if the key is already in the table, update the value associated with that key
+        entry = self._find_entry(key, hash)
+        if entry is not None:
+            entry.value = value
+            return
+
+        # otherwise insert the key:value pair in the first empty bucket, or "empty" bucket with a tombstone, of its
+        #   probe sequence
+        if self._place_entry(self._buckets, self._capacity, HashEntry(key, value, hash), hash):
+            self._tombstones -= 1
+        self._size += 1
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = self._hash_many(keys)
+
+        # double the capacity until the whole batch fits under the 0.5 load factor, then resize once
+        capacity = self._capacity
+        while (self._size + keys.length()) / capacity >= 0.5:
+            capacity *= 2
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
 
     def table_load(self) -> float:
         """
@@ -136,13 +189,26 @@ class HashMap:
 
     def empty_buckets(self) -> int:
         """
-        Determines the number of empty buckets in a HashMap and returns that value.
+        Determines the number of empty buckets in a HashMap and returns that value. Buckets holding a tombstone are
+        not counted as empty.
 
         :param: None
 
         :return: an integer representing the number of empty buckets in the HashMap
         """
-        return self._capacity - self._size
+        if self._old_buckets is None:
+            return self._capacity - self._size - self._tombstones
+
+        # during an incremental resize, live entries can be in either bucket array, so the empty buckets of the new
+        #   array and of the old buckets that have not been migrated yet are counted directly
+        empty_buckets = 0
+        for bucket in range(self._capacity):
+            if self._buckets[bucket] is None:
+                empty_buckets += 1
+        for bucket in range(self._rehash_index, self._old_capacity):
+            if self._old_buckets[bucket] is None:
+                empty_buckets += 1
+        return empty_buckets
 
     def resize_table(self, new_capacity: int) -> None:
         """
@@ -152,7 +218,11 @@ class HashMap:
         or equal to 0.5.
 
         Capacity must be a prime number, if the provided value is not prime, capacity will be adjusted
-        to the closest prime number larger than the provided value.
+        to the closest prime number larger than the provided value. In power-of-two mode (see
+        set_power_of_two_capacity()) it is rounded up to a power of two instead.
+
+        If incremental resizing is turned on, only the new bucket array is set up here, and the existing entries are
+        migrated a few buckets at a time by later operations (see set_incremental_resize()).
 
         :param new_capacity: the desired capacity for the HashMap
 
@@ -161,44 +231,167 @@ class HashMap:
         # only resize if the desired capacity is large enough to fit all existing values
         if new_capacity >= self._size:
 
-            # copy existing key/value pairs to an array and the capacity before adjustment to a variable
-            current_map = self.get_keys_and_values()
-            capacity = self._capacity
+            # a resize that is still migrating has to finish before another one can start
+            self._finish_rehash()
+
+            # calculate new capacity (must be prime, or a power of two in power-of-two mode)
+            round_up = next_power_of_two if self._power_of_two else next_prime
+            new_capacity = round_up(new_capacity)
+
+            # if re-inserting every entry would push the load factor to 0.5, keep doubling the capacity the same way
+            #   put() would, so the whole resize happens in one step
+            while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+                new_capacity = round_up(new_capacity * 2)
+
+            # allocate the new bucket array at its final size, the current buckets become the ones to migrate from
+            self._old_buckets, self._old_capacity = self._buckets, self._capacity
+            self._buckets, self._capacity = DynamicArray([None] * new_capacity), new_capacity
+            self._rehash_index = 0
+
+            # tombstones are dropped rather than migrated, so the new bucket array starts without any
+            self._tombstones = 0
+
+            # without incremental resizing, every live HashEntry is moved across right away
+            if self._rehash_step == 0:
+                self._finish_rehash()
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping every tombstone so that probe sequences only pass over
+        live entries again. This method is called in put() automatically when live entries and tombstones together
+        fill three quarters of the table.
 
-            # remove all values from HashMap
-            self.clear()
+        :param: None
 
-            # calculate new capacity (must be prime)
-            if self._is_prime(new_capacity) is True:
-                self._capacity = new_capacity
-            else:
-                self._capacity = self._next_prime(new_capacity)
+        :return: no return value
+        """
+        self.resize_table(self._capacity)
 
-            # determine if adjustment is adding or removing buckets
-            if self._capacity > capacity:
-                for _ in range(capacity, self._capacity):
-                    self._buckets.append(None)              # add empty buckets if increasing capacity
-            else:
-                for _ in range(capacity - self._capacity):
-                    self._buckets.pop()                     # remove buckets if decreasing capacity
+    def set_power_of_two_capacity(self, enabled: bool = True) -> None:
+        """
+        Turns power-of-two capacity mode on or off, and rebuilds the table at the nearest capacity for the new mode.
+        In power-of-two mode the home bucket is picked by fibonacci_hash(), a multiply and a shift instead of a modulo
+        that still spreads weak hashes over the table, and probing steps by 1, 2, 3, ... buckets
+        (triangular probing), which visits every bucket of a power-of-two table.
 
-            # rehash values that were copied to the current_map variable, using the new capacity
-            for pairs in range(current_map.length()):
-                self.put(current_map[pairs][0], current_map[pairs][1])
+        :param enabled: True for power-of-two capacities, False for the default prime capacities
 
-    def get(self, key: str) -> object:
+        :return: no return value
+        """
+        # both bucket arrays of a resize in progress have to use the same mode, so nothing is left to migrate
+        self._finish_rehash()
+        self._power_of_two = enabled
+        self.resize_table(self._capacity)
+        self._finish_rehash()
+
+    def set_incremental_resize(self, buckets_per_step: int) -> None:
+        """
+        Turns incremental resizing on or off. When it is on, a resize keeps the old and new bucket arrays side by
+        side, and each put(), get(), contains_key() and remove() migrates at most buckets_per_step of the old buckets
+        into the new array. Lookups check both arrays until the migration is done, so no single operation has to
+        rehash the whole table.
+
+        :param buckets_per_step: the number of old buckets to migrate per operation, 0 turns incremental resizing off
+
+        :return: no return value
+        """
+        self._rehash_step = max(buckets_per_step, 0)
+
+        # turning incremental resizing off finishes any migration that is in progress
+        if self._rehash_step == 0:
+            self._finish_rehash()
+
+    def resize_step(self, buckets: int) -> bool:
+        """
+        Migrates up to the given number of old buckets of an incremental resize in progress, so that callers such as
+        hash_map_async can finish a resize in chunks of their own choosing between operations.
+
+        :param buckets: the number of old buckets to migrate
+
+        :return: True if the resize is still in progress afterwards, False if there is nothing left to migrate
+        """
+        if self._old_buckets is not None:
+            self._rehash(buckets)
+        return self._old_buckets is not None
+
+    def _rehash(self, buckets: int) -> None:
+        """
+        Migrates the live entries of the next group of old buckets into the new bucket array, using the hash stored in
+        each entry rather than hashing its key again. Tombstones are dropped.
+        Once every old bucket has been migrated, the old bucket array is released.
+
+        :param buckets: the number of old buckets to migrate
+
+        :return: no return value
+        """
+        stop = min(self._rehash_index + buckets, self._old_capacity)
+        for bucket in range(self._rehash_index, stop):
+            entry = self._old_buckets[bucket]
+            if entry is not None and entry.is_tombstone is False:
+                if self._place_entry(self._buckets, self._capacity, entry, entry.hash):
+                    self._tombstones -= 1
+
+        self._rehash_index = stop
+        if stop == self._old_capacity:
+            self._old_buckets, self._old_capacity = None, 0
+
+    def _finish_rehash(self) -> None:
+        """
+        Migrates every remaining old bucket, if a resize is in progress.
+
+        :param: None
+
+        :return: no return value
+        """
+        if self._old_buckets is not None:
+            self._rehash(self._old_capacity)
+
+    def _place_entry(self, buckets: DynamicArray, capacity: int, entry: HashEntry, hash: int) -> bool:
+        """
+        Places a HashEntry into the first empty bucket, or bucket holding a tombstone, of its probe sequence in a
+        bucket array, without allocating a new entry or checking the table load.
+
+        :param buckets: the bucket array to place the entry in
+        :param capacity: the number of buckets in the array
+        :param entry: the live HashEntry to place
+        :param hash: the value of the HashMap's hash function for the entry's key
+
+        :return: True if the entry took the place of a tombstone, False if it went into an empty bucket
+        """
+        if self._power_of_two:
+            mask = capacity - 1
+            bucket, step = fibonacci_hash(hash, capacity), 1
+            while buckets[bucket] is not None and buckets[bucket].is_tombstone is False:
+                bucket = (bucket + step) & mask
+                step += 1
+        else:
+            initial = hash % capacity
+            bucket, quad_probe = initial, 1
+            while buckets[bucket] is not None and buckets[bucket].is_tombstone is False:
+                bucket = (initial + quad_probe ** 2) % capacity
+                quad_probe += 1
+
+        reused_tombstone = buckets[bucket] is not None
+        buckets[bucket] = entry
+        return reused_tombstone
+
+    def get(self, key: str, default: object = None) -> object:
         """
         Returns the value associated with the provided key in the HashMap.
 
         :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
 
-        :return: the value object associated with the provided key, returns None if the key is not found
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
         """
-        # iterate through each bucket (index) searching for a matching key, key must be in a bucket that is not a
-        #   tombstone placeholder value
-        for ele in range(self._capacity):
-            if self._buckets[ele] is not None and self._buckets[ele].key == key and self._buckets[ele].is_tombstone is False:
-                return self._buckets[ele].value
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        # follow the quadratic probe sequence for the key, if a live entry is found return its value
+        entry = self._find_entry(key)
+        if entry is not None:
+            return entry.value
+        return default
 
     def contains_key(self, key: str) -> bool:
         """
@@ -208,13 +401,10 @@ class HashMap:
 
         :return: True if the key exists, False if it does not exist
         """
-        # iterate through each bucket (index) searching for a matching key, key must be in a bucket that is not a
-        #   tombstone placeholder value
-        for ele in range(self._capacity):
-            if self._buckets[ele] is not None and self._buckets[ele].key == key and self._buckets[ele].is_tombstone is False:
-                return True
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
 
-        return False
+        return self._find_entry(key) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -225,13 +415,129 @@ class HashMap:
 
         :return: no return value
         """
-        # iterate through each bucket (index) searching for a matching key, key must be in a bucket that is not already
-        #   a tombstone placeholder value
-        # if found the HashEntry tombstone data member is updated to True, effectively removing it from the table
-        for ele in range(self._capacity):
-            if self._buckets[ele] is not None and self._buckets[ele].key == key and self._buckets[ele].is_tombstone is False:
-                self._buckets[ele].is_tombstone = True
-                self._size -= 1
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        self._remove_hashed(key, self._hash_function(key))
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            entry = self._find_entry(keys[index], hashes[index])
+            values.append(entry.value if entry is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed hash. Keys that are not in the HashMap are
+        ignored.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        # follow the quadratic probe sequence for the key, if found the HashEntry tombstone data member is updated
+        #   to True, effectively removing it from the table
+        entry = self._probe(self._buckets, self._capacity, key, hash)
+        in_old_buckets = entry is None and self._old_buckets is not None
+        if in_old_buckets:
+            entry = self._probe(self._old_buckets, self._old_capacity, key, hash)
+        if entry is None:
+            return False
+
+        entry.is_tombstone = True
+        self._size -= 1
+
+        # only tombstones in the current bucket array are counted, one left in the old bucket array of an incremental
+        #   resize is dropped when its bucket is migrated
+        if not in_old_buckets:
+            self._tombstones += 1
+        return True
+
+    def _find_entry(self, key: str, hash: int = None) -> HashEntry:
+        """
+        Locates the live HashEntry for a key. If a resize is being migrated incrementally, the new bucket array is
+        searched first and then the old one.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the value of the HashMap's hash function for the key, computed here if not provided
+
+        :return: the live HashEntry for the key, returns None if the key is not found
+        """
+        if hash is None:
+            hash = self._hash_function(key)
+
+        entry = self._probe(self._buckets, self._capacity, key, hash)
+        if entry is None and self._old_buckets is not None:
+            entry = self._probe(self._old_buckets, self._old_capacity, key, hash)
+        return entry
+
+    def _probe(self, buckets: DynamicArray, capacity: int, key: str, hash: int) -> HashEntry:
+        """
+        Follows the same probe sequence used by put() to search a bucket array for a key. Tombstones are
+        skipped over, and the search stops at the first empty (None) bucket since the key cannot be past that point.
+        Stored hashes are compared before keys, so most non-matching entries are passed over without a key comparison.
+
+        :param buckets: the bucket array to search
+        :param capacity: the number of buckets in the array
+        :param key: the key to search for
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: the live HashEntry for the key, returns None if the key is not found
+        """
+        if self._power_of_two:
+            mask = capacity - 1
+            bucket = fibonacci_hash(hash, capacity)
+
+            # the triangular probe sequence visits every bucket once in its first capacity steps
+            for step in range(1, capacity + 1):
+                entry = buckets[bucket]
+
+                if entry is None:
+                    return None
+                if entry.is_tombstone is False and entry.hash == hash and entry.key == key:
+                    return entry
+                bucket = (bucket + step) & mask
+
+            return None
+
+        initial = hash % capacity
+
+        # a probe sequence can visit at most capacity buckets before it starts repeating itself
+        for quad_probe in range(capacity):
+            entry = buckets[(initial + quad_probe ** 2) % capacity]
+
+            if entry is None:
+                return None
+            if entry.is_tombstone is False and entry.hash == hash and entry.key == key:
+                return entry
+
+        return None
 
     def clear(self) -> None:
         """
@@ -241,6 +547,10 @@ class HashMap:
 
         :return: no return value
         """
+        # any resize in progress is abandoned, there is nothing left to migrate
+        self._old_buckets, self._old_capacity = None, 0
+        self._tombstones = 0
+
         # check each bucket in the table, if a bucket has any value other than None, update its value to None
         for ele in range(self._capacity):
             if self._buckets[ele] is not None:
@@ -249,24 +559,123 @@ class HashMap:
         # all values in the table have been removed, update size to 0
         self._size = 0
 
-    def get_keys_and_values(self) -> DynamicArray:
+    def _hash_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Hashes a batch of keys with the HashMap's hash function in a single call, using the vectorized version of
+        the function when one is available. Used by the bulk operations.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a Dynamic Array of hash values, in the same order as the keys
+        """
+        return hash_batch(self._hash_function, keys)
+
+    def _iter_items(self):
         """
-        Puts all the key/value pairs of a HashMap into a Dynamic Array as a tuple, one tuple for each key/value pair.
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once and skipping empty buckets
+        and tombstones. Nothing is copied, so the HashMap should not be changed while the generator is in use.
 
         :param: None
 
-        :return: a Dynamic Array containing tuples of the key/value pairs from the HashMap
+        :return: a generator of (key, value) tuples
+        """
+        # entries still waiting to be migrated by an incremental resize are moved across first
+        self._finish_rehash()
+
+        for bucket in range(self._capacity):
+            entry = self._buckets[bucket]
+            if entry is not None and entry.is_tombstone is False:
+                yield entry.key, entry.value
+
+    def save(self, path: str) -> None:
+        """
+        Writes a binary snapshot of the table to a file (see hash_map_snapshot), recording the bucket index and
+        stored hash of every entry and tombstone along with the capacity and the identity of the hash function, so
+        that load() can rebuild the same layout without hashing or probing. Settings such as incremental resizing
+        are not saved.
+
+        :param path: the file to write
+
+        :return: no return value
         """
-        # create a dynamic array to place key/value pairs into
-        key_val = DynamicArray()
+        # entries still waiting to be migrated by an incremental resize are moved across first
+        self._finish_rehash()
 
-        # check each index for a value that is not None or a tombstone, if found place the key/value pair as a
-        #   tuple into the key_val array
+        buckets, hashes, flags, keys, values = [], [], bytearray(), [], []
         for bucket in range(self._capacity):
-            if self._buckets[bucket] is not None and self._buckets[bucket].is_tombstone is False:
-                key_val.append((self._buckets[bucket].key, self._buckets[bucket].value))
+            entry = self._buckets[bucket]
+            if entry is not None:
+                buckets.append(bucket)
+                hashes.append(entry.hash)
 
-        return key_val
+                # tombstones keep their place so probe sequences that pass over them still reach the entries beyond
+                flags.append(entry.is_tombstone)
+                keys.append(None if entry.is_tombstone else entry.key)
+                values.append(None if entry.is_tombstone else entry.value)
+
+        write_snapshot(path, KIND_OA, self._capacity, self._power_of_two, self._hash_function,
+                       buckets, hashes, flags, keys, values)
+
+    @classmethod
+    def load(cls, path: str, function=None) -> "HashMap":
+        """
+        Creates a HashMap from a snapshot written by save(). The file is mapped into memory and every entry is put
+        straight back into its recorded bucket with its stored hash. If the hash function no longer gives the stored
+        hashes, such as the built-in hash() of str keys in another process, the pairs are inserted again instead.
+
+        Only load snapshots from a trusted source: the keys and values are unpickled, and the hash function recorded
+        in the snapshot is imported by name, so a crafted file can run arbitrary code.
+
+        :param path: the snapshot file to read
+        :param function: the hash function to use, by default the one recorded in the snapshot
+
+        :return: the new HashMap
+        """
+        with open_snapshot(path) as snapshot:
+            snapshot.check_kind(KIND_OA)
+            hash_map = cls(0, function or resolve_hash_function(snapshot.function_name))
+            if snapshot.power_of_two:
+                hash_map._power_of_two = True
+
+            if not snapshot.hashes_match(hash_map._hash_function):
+                hash_map.resize_table(snapshot.capacity)
+                for key, value in snapshot.live_pairs():
+                    hash_map.put(key, value)
+                return hash_map
+
+            buckets = [None] * snapshot.capacity
+            size = 0
+            for bucket, hash, tombstone, key, value in snapshot.entries():
+                entry = HashEntry(key, value, hash)
+                if tombstone:
+                    entry.is_tombstone = True
+                else:
+                    size += 1
+                buckets[bucket] = entry
+
+        hash_map._buckets, hash_map._capacity = DynamicArray(buckets), snapshot.capacity
+        hash_map._size, hash_map._tombstones = size, snapshot.count - size
+        return hash_map
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        entry = self._find_entry(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry.value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        if not self._remove_hashed(key, self._hash_function(key)):
+            raise KeyError(key)
 
 # These tests were provided by the instructional staff to help with debugging and implementing the HashMap.
 # None of the below code was written by me.
@@ -458,3 +867,97 @@ if __name__ == "__main__":
     m.remove('1')
     m.resize_table(12)
     print(m.get_keys_and_values())
+
+
+# ------------------- REGRESSION CHECKS -------------------------------- #
+
+if __name__ == "__main__":
+
+    print("\nREGRESSION - tombstones removed during an incremental resize")
+    print("-------------------------------------------------------------")
+    m = HashMap(11, hash_function_1)
+    m.set_incremental_resize(1)
+    for i in range(6):
+        m.put('key' + str(i), i)
+
+    # this put starts a resize, so the first entries are still in the old bucket array when they are removed
+    m.put('key6', 6)
+    for i in range(7):
+        m.remove('key' + str(i))
+    m.resize_step(m.get_capacity())
+
+    tombstones = sum(1 for i in range(m.get_capacity()) if m._buckets[i] is not None)
+    empty = sum(1 for i in range(m.get_capacity()) if m._buckets[i] is None)
+    print(m._tombstones == tombstones, m.empty_buckets() == empty)
+
+    print("\nREGRESSION - a snapshot with a corrupt pickled block raises the unpickling error")
+    print("--------------------------------------------------------------------------------")
+    import os
+    import pickle
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'corrupt.snapshot')
+        m = HashMap(11, hash_function_1)
+        for i in range(20):
+            m.put('key' + str(i), i)
+        m.save(path)
+
+        # the keys and values are pickled at the end of the file, so zeroing its last bytes breaks only that block
+        with open(path, 'r+b') as file:
+            file.seek(-5, os.SEEK_END)
+            file.write(bytes(5))
+        try:
+            HashMap.load(path)
+        except pickle.UnpicklingError:
+            print(True)
+        else:
+            print(False)
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    def scan_get(hash_map: HashMap, key: str) -> object:
+        """The lookup get() used to do before it followed the probe sequence: check every bucket for the key."""
+        for bucket in range(hash_map.get_capacity()):
+            entry = hash_map._buckets[bucket]
+            if entry is not None and entry.key == key and entry.is_tombstone is False:
+                return entry.value
+
+    print("\nBENCHMARK - get(), scanning every bucket vs following the probe sequence")
+    print("-------------------------------------------------------------------------")
+
+    # the builtin hash spreads the keys over the buckets, so the probe sequence stays short at every capacity and
+    #   the time per lookup should not grow with the table; hash_function_1 only sums character codes, so keys
+    #   like these share a few clustered hashes and the probe sequences grow with the table whatever get() does
+    rng = random.Random(1)
+    for capacity in (1_000, 10_000, 100_000, 1_000_000):
+        m = HashMap(capacity, hash)
+        size = int(m.get_capacity() * 0.4)
+        for i in range(size):
+            m.put(f"key{i}", i)
+        assert m.get_capacity() == next_prime(capacity)
+
+        # half of the lookups hit, half miss, which is the worst case for a scan
+        lookups = [f"key{rng.randrange(size)}" for _ in range(5_000)] + [f"missing{i}" for i in range(5_000)]
+        expected = [int(key[3:]) if key.startswith('key') else None for key in lookups]
+        start = time.perf_counter()
+        results = [m.get(key) for key in lookups]
+        probe = (time.perf_counter() - start) / len(lookups)
+        assert results == expected
+
+        line = f"capacity {m.get_capacity():>7}, {size:>6} entries: probe {probe * 1e6:5.2f} us"
+
+        # scanning is O(capacity) per lookup, so it is only timed at the small capacities
+        if capacity <= 10_000:
+            sample = lookups[::100]
+            start = time.perf_counter()
+            results = [scan_get(m, key) for key in sample]
+            scan = (time.perf_counter() - start) / len(sample)
+            assert results == expected[::100]
+            line += f", scan {scan * 1e6:9.1f} us, {scan / probe:6.0f}x faster"
+        print(line)
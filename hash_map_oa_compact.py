@@ -0,0 +1,428 @@
+# Description: This file contains an alternative storage backend for the Open Addressing HashMap. Instead of a
+#               Dynamic Array of HashEntry objects, the table is kept as parallel arrays: one byte of slot state
+#               (empty, live or tombstone) per bucket, the stored hash of each key, and the keys and values
+#               themselves. No object is allocated per entry. Collision resolution uses the same quadratic probing,
+#               0.5 load factor and tombstone compaction as hash_map_oa.HashMap, and the public methods match.
+
+
+from array import array
+
+from a6_include import DynamicArray, HashMapMixin, hash_batch, next_prime
+
+
+# slot states, stored one byte per bucket
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# stored hashes are kept in an unsigned 64-bit array, every hash is reduced to 64 bits before it is used
+_HASH_MASK = (1 << 64) - 1
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision resolution and stores its buckets as
+        parallel arrays.
+        """
+        # capacity must be an odd prime number, the same one the HashMap in hash_map_oa starts with
+        self._capacity = next_prime(capacity | 1)
+        self._states, self._hashes, self._keys, self._values = self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as hash_map_oa.HashMap
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += f"{i}: K: {self._keys[i]} V: {self._values[i]} TS: {self._states[i] == TOMBSTONE}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _allocate(capacity: int) -> tuple:
+        """
+        Allocates the parallel arrays for a table with the given number of buckets, with every bucket empty.
+
+        :param capacity: the number of buckets
+
+        :return: a tuple of the slot state, stored hash, key and value arrays
+        """
+        return bytearray(capacity), array('Q', bytes(8 * capacity)), [None] * capacity, [None] * capacity
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. If the table load
+        size is greater or equal to 0.5, this method first calls resize_table(). Otherwise, if live entries and
+        tombstones together fill three quarters of the table, this method first calls compact().
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        if self.table_load() >= 0.5:
+            self.resize_table(self._capacity * 2)
+        elif (self._size + self._tombstones) / self._capacity >= 0.75:
+            self.compact()
+
+        self._put_hashed(key, value, self._hash_function(key) & _HASH_MASK)
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed (64-bit) hash for the key. The table load is not
+        checked, callers are responsible for making sure there is room in the table.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the value of the HashMap's hash function for the key, reduced to 64 bits
+
+        :return: no return value
+        """
+        # if the key is already in the table, update the value associated with that key
+        slot = self._find_slot(key, hash)
+        if slot is not None:
+            self._values[slot] = value
+            return
+
+        # otherwise insert the key:value pair in the first empty or tombstone slot of its probe sequence
+        slot = self._free_slot(self._states, self._capacity, hash)
+        if self._states[slot] == TOMBSTONE:
+            self._tombstones -= 1
+
+        self._states[slot] = LIVE
+        self._hashes[slot] = hash
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._size += 1
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = self._hash_many(keys)
+
+        # double the capacity until the whole batch fits under the 0.5 load factor, then resize once
+        capacity = self._capacity
+        while (self._size + keys.length()) / capacity >= 0.5:
+            capacity *= 2
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value. Buckets holding a tombstone are
+        not counted as empty.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Updates the capacity of the HashMap and re-maps existing values in the HashMap after resizing, using the
+        stored hashes so no key is hashed again. The new capacity can be larger or smaller than the current capacity,
+        as long as there is space available for all elements. Tombstones are dropped.
+
+        Capacity must be a prime number, if the provided value is not prime, capacity will be adjusted
+        to the closest prime number larger than the provided value.
+
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        # only resize if the desired capacity is large enough to fit all existing values
+        if new_capacity < self._size:
+            return
+
+        # calculate new capacity (must be prime), doubling it if the existing entries would reach a 0.5 load factor
+        new_capacity = next_prime(new_capacity)
+        while self._size > 0 and (self._size - 1) / new_capacity >= 0.5:
+            new_capacity = next_prime(new_capacity * 2)
+
+        states, hashes, keys, values = self._allocate(new_capacity)
+        for slot in range(self._capacity):
+            if self._states[slot] == LIVE:
+                hash = self._hashes[slot]
+                new_slot = self._free_slot(states, new_capacity, hash)
+                states[new_slot] = LIVE
+                hashes[new_slot] = hash
+                keys[new_slot] = self._keys[slot]
+                values[new_slot] = self._values[slot]
+
+        self._states, self._hashes, self._keys, self._values = states, hashes, keys, values
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping every tombstone.
+
+        :param: None
+
+        :return: no return value
+        """
+        self.resize_table(self._capacity)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        slot = self._find_slot(key, self._hash_function(key) & _HASH_MASK)
+        if slot is not None:
+            return self._values[slot]
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_slot(key, self._hash_function(key) & _HASH_MASK) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key by marking its slot as a tombstone.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._remove_hashed(key, self._hash_function(key) & _HASH_MASK)
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            slot = self._find_slot(keys[index], hashes[index])
+            values.append(self._values[slot] if slot is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed (64-bit) hash. The slot becomes a tombstone
+        and its key and value references are released. Keys that are not in the HashMap are ignored.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the value of the HashMap's hash function for the key, reduced to 64 bits
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        slot = self._find_slot(key, hash)
+        if slot is None:
+            return False
+
+        self._states[slot] = TOMBSTONE
+        self._keys[slot] = None
+        self._values[slot] = None
+        self._size -= 1
+        self._tombstones += 1
+        return True
+
+    def _find_slot(self, key: str, hash: int) -> int:
+        """
+        Follows the quadratic probe sequence for a key, skipping tombstones and stopping at the first empty slot.
+        Stored hashes are compared before keys, so most non-matching slots are passed over without a key comparison.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the value of the HashMap's hash function for the key, reduced to 64 bits
+
+        :return: the index of the live slot holding the key, returns None if the key is not found
+        """
+        states, hashes, keys, capacity = self._states, self._hashes, self._keys, self._capacity
+        initial = hash % capacity
+
+        # a probe sequence can visit at most capacity slots before it starts repeating itself
+        for quad_probe in range(capacity):
+            slot = (initial + quad_probe ** 2) % capacity
+            state = states[slot]
+
+            if state == EMPTY:
+                return None
+            if state == LIVE and hashes[slot] == hash and keys[slot] == key:
+                return slot
+
+        return None
+
+    @staticmethod
+    def _free_slot(states: bytearray, capacity: int, hash: int) -> int:
+        """
+        Follows the quadratic probe sequence for a hash until it reaches an empty or tombstone slot.
+
+        :param states: the slot state array to probe
+        :param capacity: the number of slots in the array
+        :param hash: the 64-bit hash of the key being placed
+
+        :return: the index of the first slot in the probe sequence that can take a new entry
+        """
+        initial = hash % capacity
+        slot, quad_probe = initial, 1
+        while states[slot] == LIVE:
+            slot = (initial + quad_probe ** 2) % capacity
+            quad_probe += 1
+        return slot
+
+    def clear(self) -> None:
+        """
+        Clears the contents of a HashMap object. The underlying capacity of the table is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._states, self._hashes, self._keys, self._values = self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def _hash_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Hashes a batch of keys with the HashMap's hash function in a single call, reducing each hash to 64 bits.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a Dynamic Array of hash values, in the same order as the keys
+        """
+        hashes = hash_batch(self._hash_function, keys)
+        return DynamicArray([hashes[index] & _HASH_MASK for index in range(hashes.length())])
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each slot once and skipping empty slots and
+        tombstones. Nothing is copied, so the HashMap should not be changed while the generator is in use.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        states, keys, values = self._states, self._keys, self._values
+        for slot in range(self._capacity):
+            if states[slot] == LIVE:
+                yield keys[slot], values[slot]
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        slot = self._find_slot(key, self._hash_function(key) & _HASH_MASK)
+        if slot is None:
+            raise KeyError(key)
+        return self._values[slot]
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if not self._remove_hashed(key, self._hash_function(key) & _HASH_MASK):
+            raise KeyError(key)
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    import hash_map_oa
+    from hash_functions import fnv1a
+
+    count = 200_000
+    pairs = [(f"customer:{i:08d}", i) for i in range(count)]
+    print(f"{count} entries, hashed with fnv1a, against hash_map_oa's HashEntry per entry layout")
+
+    def build(map_class):
+        """Put every pair into a new HashMap of the given class, one put() at a time."""
+        hash_map = map_class(11, fnv1a)
+        for key, value in pairs:
+            hash_map.put(key, value)
+        return hash_map
+
+    for name, map_class in (("HashEntry objects", hash_map_oa.HashMap), ("parallel arrays", HashMap)):
+        # the keys and values exist before the table does, so only the table's own memory is traced; tracing slows
+        #   everything down, so the timings come from a second, untraced build
+        tracemalloc.start()
+        m = build(map_class)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del m
+
+        start = time.perf_counter()
+        m = build(map_class)
+        put_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for key, value in pairs:
+            assert m.get(key) == value
+        get_time = time.perf_counter() - start
+
+        print(f"{name:>18}: {memory / count:6.1f} bytes per entry, capacity {m.get_capacity()}, "
+              f"put {put_time:5.2f}s, get {get_time:5.2f}s")
@@ -0,0 +1,429 @@
+# Description: This file contains an Open Addressing HashMap that uses Robin Hood hashing for collision resolution.
+#               Entries are placed by linear probing, and every bucket records how far its entry sits from the
+#               bucket its hash points to (its probe distance). An entry being inserted takes the place of any entry
+#               that is closer to its own home bucket, which keeps probe lengths short and even. Lookups stop as soon
+#               as they pass an entry closer to home than the key would be, and remove() shifts the following entries
+#               back instead of leaving a tombstone. The public methods match hash_map_oa.HashMap, so either engine
+#               can be used in place of the other.
+
+
+from a6_include import DynamicArray, HashMapMixin, hash_batch, next_prime
+
+
+class RobinHoodEntry:
+    """
+    Entry for use in a Robin Hood hash map, storing the full hash of the key and the entry's probe distance
+    """
+
+    __slots__ = ('key', 'value', 'hash', 'distance')
+
+    def __init__(self, key: str, value: object, hash: int, distance: int = 0) -> None:
+        """Initialize an entry given a key, value and the hash of the key."""
+        self.key = key
+        self.value = value
+        self.hash = hash
+        self.distance = distance
+
+    def __str__(self) -> str:
+        """Override string method to provide more readable output."""
+        return f"K: {self.key} V: {self.value} D: {self.distance}"
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function, max_load: float = 0.9) -> None:
+        """
+        Initialize new HashMap that uses Robin Hood hashing for collision resolution. The table grows once the
+        load factor would pass max_load, which must be greater than 0 and less than 1.
+        """
+        # a full table would leave insertion probing forever for an empty bucket
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be greater than 0 and less than 1")
+
+        self._buckets = DynamicArray()
+
+        # capacity must be a prime number
+        self._capacity = next_prime(capacity)
+        for _ in range(self._capacity):
+            self._buckets.append(None)
+
+        self._hash_function = function
+        self._size = 0
+        self._max_load = max_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i in range(self._buckets.length()):
+            out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. If adding the
+        key would push the table load past the maximum load factor, this method first doubles the capacity.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        if (self._size + 1) / self._capacity > self._max_load:
+            self.resize_table(self._capacity * 2)
+
+        self._put_hashed(key, value, self._hash_function(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed hash for the key. The table load is not checked,
+        callers are responsible for making sure there is room in the table.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: no return value
+        """
+        bucket = self._find_bucket(key, hash)
+        if bucket is not None:
+            self._buckets[bucket].value = value
+            return
+
+        self._place_entry(self._buckets, self._capacity, RobinHoodEntry(key, value, hash))
+        self._size += 1
+
+    @staticmethod
+    def _place_entry(buckets: DynamicArray, capacity: int, entry: RobinHoodEntry) -> None:
+        """
+        Inserts an entry by linear probing from its home bucket. Whenever the entry being carried has probed further
+        than the entry in the current bucket, the two swap places and probing continues with the displaced entry.
+
+        :param buckets: the bucket array to place the entry in
+        :param capacity: the number of buckets in the array
+        :param entry: the entry to place, its probe distance is reset here
+
+        :return: no return value
+        """
+        entry.distance = 0
+        bucket = entry.hash % capacity
+
+        while buckets[bucket] is not None:
+            if buckets[bucket].distance < entry.distance:
+                buckets[bucket], entry = entry, buckets[bucket]
+
+            bucket = (bucket + 1) % capacity
+            entry.distance += 1
+
+        buckets[bucket] = entry
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = self._hash_many(keys)
+
+        # double the capacity until the whole batch fits under the maximum load factor, then resize once
+        capacity = self._capacity
+        while (self._size + keys.length()) / capacity > self._max_load:
+            capacity *= 2
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value. There are no tombstones, so
+        every bucket without a live entry is empty.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        return self._capacity - self._size
+
+    def get_probe_stats(self) -> tuple:
+        """
+        Measures the probe distance of every entry in the table, the number of buckets past its home bucket that a
+        lookup for its key has to look at.
+
+        :param: None
+
+        :return: a tuple of the mean and the maximum probe distance, (0, 0) for an empty HashMap
+        """
+        total, longest = 0, 0
+        for bucket in range(self._capacity):
+            entry = self._buckets[bucket]
+            if entry is not None:
+                total += entry.distance
+                longest = max(longest, entry.distance)
+
+        return (total / self._size if self._size else 0), longest
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Updates the capacity of the HashMap and re-maps existing values in the HashMap after resizing, using the hash
+        stored in each entry. The new capacity can be larger or smaller than the current capacity, as long as all
+        elements fit under the maximum load factor; if they would not, the capacity is doubled until they do.
+
+        Capacity must be a prime number, if the provided value is not prime, capacity will be adjusted
+        to the closest prime number larger than the provided value.
+
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        # only resize if the desired capacity is large enough to fit all existing values
+        if new_capacity < self._size:
+            return
+
+        new_capacity = next_prime(new_capacity)
+        while self._size / new_capacity > self._max_load:
+            new_capacity = next_prime(new_capacity * 2)
+
+        new_buckets = DynamicArray([None] * new_capacity)
+        for bucket in range(self._capacity):
+            if self._buckets[bucket] is not None:
+                self._place_entry(new_buckets, new_capacity, self._buckets[bucket])
+
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        bucket = self._find_bucket(key, self._hash_function(key))
+        if bucket is not None:
+            return self._buckets[bucket].value
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_bucket(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key. The entries after it are shifted back
+        one bucket, so no tombstone is needed.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._remove_hashed(key, self._hash_function(key))
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            bucket = self._find_bucket(keys[index], hashes[index])
+            values.append(self._buckets[bucket].value if bucket is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed hash, then shifts each following entry back
+        one bucket until reaching an empty bucket or an entry that is already in its home bucket.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        bucket = self._find_bucket(key, hash)
+        if bucket is None:
+            return False
+
+        following = (bucket + 1) % self._capacity
+        while self._buckets[following] is not None and self._buckets[following].distance > 0:
+            self._buckets[following].distance -= 1
+            self._buckets[bucket] = self._buckets[following]
+            bucket, following = following, (following + 1) % self._capacity
+
+        self._buckets[bucket] = None
+        self._size -= 1
+        return True
+
+    def _find_bucket(self, key: str, hash: int) -> int:
+        """
+        Probes linearly from the key's home bucket. The search stops at an empty bucket, or as soon as it reaches an
+        entry closer to its own home bucket than the key would be, since Robin Hood insertion would have placed the
+        key before that entry.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: the index of the bucket holding the key, returns None if the key is not found
+        """
+        bucket, distance = hash % self._capacity, 0
+
+        while True:
+            entry = self._buckets[bucket]
+            if entry is None or entry.distance < distance:
+                return None
+            if entry.hash == hash and entry.key == key:
+                return bucket
+
+            bucket = (bucket + 1) % self._capacity
+            distance += 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of a HashMap object. The underlying capacity of the table is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._buckets = DynamicArray([None] * self._capacity)
+        self._size = 0
+
+    def _hash_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Hashes a batch of keys with the HashMap's hash function in a single call, using the vectorized version of
+        the function when one is available. Used by the bulk operations.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a Dynamic Array of hash values, in the same order as the keys
+        """
+        return hash_batch(self._hash_function, keys)
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once. Nothing is copied, so the
+        HashMap should not be changed while the generator is in use.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        for bucket in range(self._capacity):
+            entry = self._buckets[bucket]
+            if entry is not None:
+                yield entry.key, entry.value
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        bucket = self._find_bucket(key, self._hash_function(key))
+        if bucket is None:
+            raise KeyError(key)
+        return self._buckets[bucket].value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if not self._remove_hashed(key, self._hash_function(key)):
+            raise KeyError(key)
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+
+    import hash_map_oa
+    from hash_functions import fnv1a
+
+    capacity = 20011
+    print(f"{capacity} buckets, hashed with fnv1a: Robin Hood probe distances, and operations per second against "
+          f"hash_map_oa's quadratic probing")
+    for load in (0.5, 0.75, 0.9):
+        count = int(capacity * load)
+        keys = [f"user:{i:08d}" for i in range(count)]
+        missing = [f"none:{i:08d}" for i in range(count)]
+
+        rates = []
+        for make in (lambda: HashMap(capacity, fnv1a, max_load=0.95), lambda: hash_map_oa.HashMap(capacity, fnv1a)):
+            start = time.perf_counter()
+            m = make()
+            for key in keys:
+                m.put(key, key)
+            put = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for key in keys:
+                m.get(key)
+            hit = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for key in missing:
+                m.get(key)
+            miss = time.perf_counter() - start
+            rates.append((count / put / 1000, count / hit / 1000, count / miss / 1000, m))
+
+        (rh_put, rh_hit, rh_miss, rh), (oa_put, oa_hit, oa_miss, oa) = rates
+        mean, longest = rh.get_probe_stats()
+        print(f"load {load:.2f}: mean probe {mean:5.2f}, max {longest:3}; Robin Hood put {rh_put:4.0f}k, "
+              f"hit {rh_hit:4.0f}k, miss {rh_miss:4.0f}k; quadratic (capacity {oa.get_capacity()}) put {oa_put:4.0f}k, "
+              f"hit {oa_hit:4.0f}k, miss {oa_miss:4.0f}k")
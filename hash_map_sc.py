@@ -10,11 +10,30 @@
 #               implementation to find the mode of a sorted or unsorted Dynamic Array.
 
 
-from a6_include import (DynamicArray, LinkedList,
-                        hash_function_1, hash_function_2)
+import heapq
+from operator import itemgetter
 
+from a6_include import (DynamicArray, HashMapMixin, LinkedList, SLNode, fibonacci_hash, next_prime, next_power_of_two,
+                        hash_function_1, hash_function_2, hash_batch)
+from hash_map_snapshot import KIND_SC, open_snapshot, resolve_hash_function, write_snapshot
+
+
+class HashMap(HashMapMixin):
+    # incremental resize state, see set_incremental_resize(); the defaults mean every resize happens all at once
+    _rehash_step = 0
+    _old_buckets = None
+    _old_capacity = 0
+    _rehash_index = 0
+
+    # automatic resize state, see set_load_factor_limits() and set_resize_hook(); by default the table never resizes
+    #   on its own
+    _max_load = None
+    _min_load = None
+    _resize_hook = None
+
+    # capacity mode, see set_power_of_two_capacity(); by default capacity is prime and buckets are picked with %
+    _power_of_two = False
 
-class HashMap:
     def __init__(self,
                  capacity: int = 11,
                  function: callable = hash_function_1) -> None:
@@ -41,6 +60,11 @@ class HashMap:
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
+
+        # old buckets of an incremental resize that have not been migrated yet are still part of the table
+        if self._old_buckets is not None:
+            for i in range(self._rehash_index, self._old_capacity):
+                out += 'old ' + str(i) + ': ' + str(self._old_buckets[i]) + '\n'
         return out
 
     def _next_prime(self, capacity: int) -> int:
@@ -95,25 +119,126 @@ class HashMap:
     def put(self, key: str, value: object) -> None:
         """
         Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
-        associated value. If the key already exists in the table, the value for the key is updated.
+        associated value. If the key already exists in the table, the value for the key is updated. If an upper load
+        factor limit is set and the table load has reached it, this method first doubles the capacity.
 
         :param key: the key to place or update in the table
         :param value: the value associated with they key being added or updated in the table
 
         :return: no return value
         """
-        # identify bucket in HashMap to insert key/value pair
-        bucket = self._hash_function(key) % self._capacity
+        if self._max_load is not None and self.table_load() >= self._max_load:
+            self.resize_table(self._capacity * 2)
+        elif self._old_buckets is not None:
+            self._rehash(self._rehash_step)
 
-        # scenario where the key is already in the HashMap, overwrite current value at that key
-        if self._buckets[bucket].contains(key) is not None:
-            self._buckets[bucket].contains(key).value = value
+        self._put_hashed(key, value, self._hash_function(key))
 
-        # if key is new to HashMap, insert key/value pair at identified bucket
-        else:
-            self._buckets[bucket].insert(key, value)
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed hash for the key.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: no return value
+        """
+        # while an incremental resize is migrating, the key may still be in its old bucket, overwrite it there
+        if self._old_buckets is not None:
+            node = self._old_buckets[self._bucket_index(hash, self._old_capacity)].contains(key, hash)
+            if node is not None:
+                node.value = value
+                return
+
+        # overwrite the current value if the key is already in its bucket, or insert the key/value pair there, in
+        #   a single walk of the chain
+        if self._buckets[self._bucket_index(hash, self._capacity)].upsert(key, value, hash):
             self._size += 1
 
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and if an upper load factor
+        limit is set, the table is resized at most once, to a capacity large enough for the whole batch, before the
+        pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = self._hash_many(keys)
+
+        # double the capacity until the whole batch fits under the upper load factor limit, then resize once
+        if self._max_load is not None:
+            capacity = self._capacity
+            while (self._size + keys.length()) / capacity >= self._max_load:
+                capacity *= 2
+            if capacity != self._capacity:
+                self.resize_table(capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Adds an amount to the value for a key, inserting the key with the amount as its value if it is not in the
+        HashMap yet, in a single walk of the key's chain. Resizes the same way put() does.
+
+        :param key: the key whose value is increased
+        :param amount: the amount to add to the value
+
+        :return: the value for the key after the increase
+        """
+        if self._max_load is not None and self.table_load() >= self._max_load:
+            self.resize_table(self._capacity * 2)
+        elif self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        hash = self._hash_function(key)
+        node = self._find_node(key, hash)
+        if node is not None:
+            node.value += amount
+            return node.value
+
+        # the key is in neither chain, so it can go straight to the front of its bucket without another walk
+        self._buckets[self._bucket_index(hash, self._capacity)].insert(key, amount, hash)
+        self._size += 1
+        return amount
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            node = self._find_node(keys[index], hashes[index])
+            values.append(node.value if node is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+        self._shrink_if_underloaded()
+
     def empty_buckets(self) -> int:
         """
         Determines the number of empty buckets in a HashMap and returns that value.
@@ -130,6 +255,12 @@ class HashMap:
             if self._buckets[val].length() == 0:
                 empty_buckets += 1
 
+        # old buckets of an incremental resize that have not been migrated yet are still part of the table
+        if self._old_buckets is not None:
+            for val in range(self._rehash_index, self._old_capacity):
+                if self._old_buckets[val].length() == 0:
+                    empty_buckets += 1
+
         # return the bucket counter after checking all buckets
         return empty_buckets
 
@@ -152,6 +283,9 @@ class HashMap:
 
         :return: no return value
         """
+        # any resize in progress is abandoned, there is nothing left to migrate
+        self._old_buckets, self._old_capacity = None, 0
+
         # check each bucket in the table, if a bucket has a length > 0, set that bucket to a new, empty SLL
         for list in range(self._capacity):
             if self._buckets[list].length() > 0:
@@ -166,7 +300,11 @@ class HashMap:
         The new capacity can be larger or smaller than the current capacity.
 
         Capacity must be a prime number, if the provided value is not prime, capacity will be adjusted
-        to the closest prime number larger than the provided value.
+        to the closest prime number larger than the provided value. In power-of-two mode (see
+        set_power_of_two_capacity()) it is rounded up to a power of two instead.
+
+        If incremental resizing is turned on, only the new buckets are set up here, and the existing nodes are
+        migrated a few buckets at a time by later operations (see set_incremental_resize()).
 
         :param new_capacity: the desired capacity for the HashMap
 
@@ -175,46 +313,181 @@ class HashMap:
         # check if new capacity valid
         if new_capacity >= 1:
 
-            # copy existing key/value pairs to an array and the capacity before adjustment to a variable
-            table = self.get_keys_and_values()
-            capacity = self._capacity
-
-            # remove all values from HashMap
-            self.clear()
-
-            # calculate new capacity (must be prime)
-            if self._is_prime(new_capacity) is False:
-                new_capacity = self._next_prime(new_capacity)
+            # a resize that is still migrating has to finish before another one can start
+            self._finish_rehash()
 
-            # determine if adjustment is adding or removing buckets
-            if new_capacity > capacity:
-                for _ in range(capacity, new_capacity):
-                    self._buckets.append(LinkedList())      # add SLL buckets if increasing capacity
+            # calculate new capacity (must be prime, or a power of two in power-of-two mode)
+            if self._power_of_two:
+                new_capacity = next_power_of_two(new_capacity)
             else:
-                for _ in range(capacity - new_capacity):
-                    self._buckets.pop()                     # remove SLL buckets if decreasing capacity
+                new_capacity = next_prime(new_capacity)
 
-            # adjust capacity data member of HashMap
+            # allocate the new buckets at their final size, the current buckets become the ones to migrate from
+            self._old_buckets, self._old_capacity = self._buckets, self._capacity
+            self._buckets = DynamicArray([LinkedList() for _ in range(new_capacity)])
             self._capacity = new_capacity
+            self._rehash_index = 0
+
+            if self._resize_hook is not None:
+                self._resize_hook(self._old_capacity, self._capacity, self._size)
+
+            # without incremental resizing, every existing node is relinked into its new bucket right away
+            if self._rehash_step == 0:
+                self._finish_rehash()
+
+    def set_load_factor_limits(self, max_load: float, min_load: float = 0.0) -> None:
+        """
+        Turns on automatic resizing. Once the table load reaches max_load, put() doubles the capacity, and once a
+        remove() drops the table load below min_load, the capacity is halved. min_load must be less than half of
+        max_load, so a table that has just grown or shrunk is not immediately resized back the other way.
+
+        :param max_load: the table load that triggers growing the table, None turns automatic resizing off
+        :param min_load: the table load that triggers shrinking the table, 0 never shrinks
+
+        :return: no return value
+        """
+        if max_load is not None and not 0 <= min_load < max_load / 2:
+            raise ValueError("min_load must be at least 0 and less than half of max_load")
+
+        self._max_load = max_load
+        self._min_load = min_load if max_load is not None else None
+
+    def set_resize_hook(self, hook: callable) -> None:
+        """
+        Registers a function to be called every time the table is resized, whether by resize_table() directly or
+        automatically. The hook is called as hook(old_capacity, new_capacity, size).
+
+        :param hook: the function to call on each resize, None removes the current hook
+
+        :return: no return value
+        """
+        self._resize_hook = hook
+
+    def _shrink_if_underloaded(self) -> None:
+        """
+        Halves the capacity if a lower load factor limit is set and the table load has dropped below it.
+
+        :param: None
+
+        :return: no return value
+        """
+        if self._min_load and self.table_load() < self._min_load:
+
+            # once the table is at its smallest capacity, halving rounds back up to the same capacity, so there is
+            #   nothing to rebuild
+            round_up = next_power_of_two if self._power_of_two else next_prime
+            new_capacity = round_up(max(self._capacity // 2, 1))
+            if new_capacity < self._capacity:
+                self.resize_table(new_capacity)
+
+    def set_power_of_two_capacity(self, enabled: bool = True) -> None:
+        """
+        Turns power-of-two capacity mode on or off, and rebuilds the table at the nearest capacity for the new mode.
+        In power-of-two mode the bucket is picked by fibonacci_hash(), a multiply and a shift instead of a modulo that
+        still spreads weak hashes over the table.
+
+        :param enabled: True for power-of-two capacities, False for the default prime capacities
+
+        :return: no return value
+        """
+        # both sets of buckets of a resize in progress have to use the same mode, so nothing is left to migrate
+        self._finish_rehash()
+        self._power_of_two = enabled
+        self.resize_table(self._capacity)
+        self._finish_rehash()
+
+    def _bucket_index(self, hash: int, capacity: int) -> int:
+        """
+        Picks the bucket for a hash in a table with the given number of buckets.
+
+        :param hash: the value of the HashMap's hash function for the key
+        :param capacity: the number of buckets in the table
+
+        :return: the index of the key's bucket
+        """
+        if self._power_of_two:
+            return fibonacci_hash(hash, capacity)
+        return hash % capacity
+
+    def set_incremental_resize(self, buckets_per_step: int) -> None:
+        """
+        Turns incremental resizing on or off. When it is on, a resize keeps the old and new buckets side by side,
+        and each put(), get(), contains_key() and remove() migrates at most buckets_per_step of the old buckets into
+        the new ones. Lookups check both until the migration is done, so no single operation has to rehash the
+        whole table.
+
+        :param buckets_per_step: the number of old buckets to migrate per operation, 0 turns incremental resizing off
+
+        :return: no return value
+        """
+        self._rehash_step = max(buckets_per_step, 0)
+
+        # turning incremental resizing off finishes any migration that is in progress
+        if self._rehash_step == 0:
+            self._finish_rehash()
+
+    def resize_step(self, buckets: int) -> bool:
+        """
+        Migrates up to the given number of old buckets of an incremental resize in progress, so that callers such as
+        hash_map_async can finish a resize in chunks of their own choosing between operations.
+
+        :param buckets: the number of old buckets to migrate
+
+        :return: True if the resize is still in progress afterwards, False if there is nothing left to migrate
+        """
+        if self._old_buckets is not None:
+            self._rehash(buckets)
+        return self._old_buckets is not None
+
+    def _rehash(self, buckets: int) -> None:
+        """
+        Relinks the nodes of the next group of old buckets into the new buckets without copying or rehashing them,
+        using the hash stored in each node. Once every old bucket has been migrated, the old buckets are released.
+
+        :param buckets: the number of old buckets to migrate
+
+        :return: no return value
+        """
+        stop = min(self._rehash_index + buckets, self._old_capacity)
+        for bucket in range(self._rehash_index, stop):
+            for node in self._old_buckets[bucket]:
+                self._buckets[self._bucket_index(node.hash, self._capacity)].insert_node(node)
+
+            # the moved nodes now belong to the new chains, so the old chain must not be searched again
+            self._old_buckets[bucket] = LinkedList()
 
-            # rehash values that were copied to the table variable, using the new capacity
-            for pairs in range(table.length()):
-                self.put(table[pairs][0], table[pairs][1])
+        self._rehash_index = stop
+        if stop == self._old_capacity:
+            self._old_buckets, self._old_capacity = None, 0
 
-    def get(self, key: str) -> object:
+    def _finish_rehash(self) -> None:
+        """
+        Migrates every remaining old bucket, if a resize is in progress.
+
+        :param: None
+
+        :return: no return value
+        """
+        if self._old_buckets is not None:
+            self._rehash(self._old_capacity)
+
+    def get(self, key: str, default: object = None) -> object:
         """
         Returns the value associated with the provided key in the HashMap.
 
         :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
 
-        :return: the value object associated with the provided key, returns None if the key is not found
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
         """
-        # identify the bucket the key would be in, if it exists in the table
-        bucket = self._hash_function(key) % self._capacity
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
 
         # if the key is found, return the associated value
-        if self._buckets[bucket].contains(key) is not None:
-            return self._buckets[bucket].contains(key).value
+        node = self._find_node(key, self._hash_function(key))
+        if node is not None:
+            return node.value
+        return default
 
     def contains_key(self, key: str) -> bool:
         """
@@ -224,14 +497,10 @@ class HashMap:
 
         :return: True if the key exists, False if it does not exist
         """
-        # identify the bucket the key would be in, if it exists in the table
-        bucket = self._hash_function(key) % self._capacity
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
 
-        # if the key is found, return True, else False
-        if self._buckets[bucket].contains(key) is not None:
-            return True
-        else:
-            return False
+        return self._find_node(key, self._hash_function(key)) is not None
 
     def remove(self, key: str) -> None:
         """
@@ -241,96 +510,237 @@ class HashMap:
 
         :return: no return value
         """
-        # identify the bucket the key would be in, if it exists in the table
-        bucket = self._hash_function(key) % self._capacity
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        self._remove_hashed(key, self._hash_function(key))
+        self._shrink_if_underloaded()
+
+    def _find_node(self, key: str, hash: int) -> SLNode:
+        """
+        Locates the node for a key using an already computed hash. If a resize is being migrated incrementally, the
+        new buckets are searched first and then the old ones.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: the node holding the key, returns None if the key is not found
+        """
+        node = self._buckets[self._bucket_index(hash, self._capacity)].contains(key, hash)
+        if node is None and self._old_buckets is not None:
+            node = self._old_buckets[self._bucket_index(hash, self._old_capacity)].contains(key, hash)
+        return node
 
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed hash, checking the old buckets too if a
+        resize is being migrated incrementally. Keys that are not in the HashMap are ignored.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the value of the HashMap's hash function for the key
+
+        :return: True if the key was found and removed, False otherwise
+        """
         # if the key exists in the identified bucket, remove and reduce the size of the table by 1
-        if self._buckets[bucket].contains(key) is not None:
-            self._buckets[bucket].remove(key)
+        if (self._buckets[self._bucket_index(hash, self._capacity)].remove(key, hash)
+                or (self._old_buckets is not None
+                    and self._old_buckets[self._bucket_index(hash, self._old_capacity)].remove(key, hash))):
             self._size -= 1
+            return True
+        return False
 
-    def get_keys_and_values(self) -> DynamicArray:
+    def _hash_many(self, keys: DynamicArray) -> DynamicArray:
         """
-        Puts all the key/value pairs of a HashMap into a Dynamic Array as a tuple, one tuple for each key/value pair.
+        Hashes a batch of keys with the HashMap's hash function in a single call, using the vectorized version of
+        the function when one is available. Used by the bulk operations.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a Dynamic Array of hash values, in the same order as the keys
+        """
+        return hash_batch(self._hash_function, keys)
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once and walking each chain once.
+        Nothing is copied, so the HashMap should not be changed while the generator is in use.
 
         :param: None
 
-        :return: a Dynamic Array containing tuples of the key/value pairs from the HashMap
+        :return: a generator of (key, value) tuples
         """
-        # create a dynamic array to place key/value pairs into
-        key_val = DynamicArray()
+        # nodes still waiting to be migrated by an incremental resize are moved across first
+        self._finish_rehash()
 
-        # check each bucket in the table
-        for val in range(self._capacity):
+        for bucket in range(self._capacity):
+            for node in self._buckets[bucket]:
+                yield node.key, node.value
+
+    def save(self, path: str) -> None:
+        """
+        Writes a binary snapshot of the table to a file (see hash_map_snapshot), recording the bucket index and
+        stored hash of every node along with the capacity and the identity of the hash function, so that load() can
+        rebuild the same chains without hashing. Settings such as load factor limits, resize hooks and incremental
+        resizing are not saved.
+
+        :param path: the file to write
+
+        :return: no return value
+        """
+        # nodes still waiting to be migrated by an incremental resize are moved across first
+        self._finish_rehash()
+
+        buckets, hashes, keys, values = [], [], [], []
+        for bucket in range(self._capacity):
+            chain = list(self._buckets[bucket])
+
+            # each chain is written tail first, so that load() inserting every node at the head restores its order
+            for node in reversed(chain):
+                buckets.append(bucket)
+                hashes.append(node.hash)
+                keys.append(node.key)
+                values.append(node.value)
+
+        write_snapshot(path, KIND_SC, self._capacity, self._power_of_two, self._hash_function,
+                       buckets, hashes, bytearray(len(buckets)), keys, values)
+
+    @classmethod
+    def load(cls, path: str, function: callable = None) -> "HashMap":
+        """
+        Creates a HashMap from a snapshot written by save(). The file is mapped into memory and every node is linked
+        straight back into its recorded bucket with its stored hash. If the hash function no longer gives the stored
+        hashes, such as the built-in hash() of str keys in another process, the pairs are inserted again instead.
+
+        Only load snapshots from a trusted source: the keys and values are unpickled, and the hash function recorded
+        in the snapshot is imported by name, so a crafted file can run arbitrary code.
+
+        :param path: the snapshot file to read
+        :param function: the hash function to use, by default the one recorded in the snapshot
+
+        :return: the new HashMap
+        """
+        with open_snapshot(path) as snapshot:
+            snapshot.check_kind(KIND_SC)
+            hash_map = cls(0, function or resolve_hash_function(snapshot.function_name))
+            if snapshot.power_of_two:
+                hash_map._power_of_two = True
+
+            if not snapshot.hashes_match(hash_map._hash_function):
+                hash_map.resize_table(snapshot.capacity)
+                for key, value in snapshot.live_pairs():
+                    hash_map.put(key, value)
+                return hash_map
+
+            buckets = [LinkedList() for _ in range(snapshot.capacity)]
+            for bucket, hash, _, key, value in snapshot.entries():
+                buckets[bucket].insert(key, value, hash)
+
+        hash_map._buckets, hash_map._capacity = DynamicArray(buckets), snapshot.capacity
+        hash_map._size = snapshot.count
+        return hash_map
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        node = self._find_node(key, self._hash_function(key))
+        if node is None:
+            raise KeyError(key)
+        return node.value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if self._old_buckets is not None:
+            self._rehash(self._rehash_step)
+
+        if not self._remove_hashed(key, self._hash_function(key)):
+            raise KeyError(key)
+        self._shrink_if_underloaded()
+
+
+def count_frequencies(values) -> HashMap:
+    """
+    Counts how often each value occurs in a single pass. The values can be any iterable, such as a Dynamic Array,
+    a list or a generator. If the number of values is known up front, the HashMap is sized for it and never has to
+    resize; otherwise it doubles whenever its load reaches 1. Values are hashed with the built-in hash(), so they
+    only need to be hashable.
+
+    :param values: an iterable of hashable values
 
-            # if 1+ values exist in the table, iterate through the values placing the key/value pairs into the
-            #   key_val array defined above
-            if self._buckets[val].length() > 0:
+    :return: a HashMap with each distinct value as a key and the number of times it occurs as its value
+    """
+    frequencies = HashMap(_expected_length(values), hash)
+    frequencies.set_load_factor_limits(1.0)
 
-                # create iterator for bucket
-                bucket_iter = iter(self._buckets[val])
+    for value in values:
+        frequencies.increment(value)
 
-                for node in range(self._buckets[val].length()):
-                    try:
-                        current_key = bucket_iter.__next__().key                # determine key of key/value
-                        value = self._buckets[val].contains(current_key).value  # use key to get value of key/value
-                        key_val.append((current_key, value))                    # put into key_val array as tuple
+    return frequencies
 
-                    # stop iterating at the end of the SLL
-                    except StopIteration:
-                        pass
 
-        return key_val
+def _expected_length(values) -> int:
+    """
+    Returns the number of values in a Dynamic Array or any other sized collection, or the default HashMap capacity
+    if the length is not known up front (for example, for a generator).
+    """
+    if isinstance(values, DynamicArray):
+        return max(values.length(), 1)
+    if hasattr(values, '__len__'):
+        return max(len(values), 1)
+    return 11
 
 
 def find_mode(da: DynamicArray) -> (DynamicArray, int):
     """
     Determines the mode (most occurring) value of an array. The array does not need to be sorted, this function
     determines mode by placing the array values into a HashMap and calculating their frequency as it goes through the
-    array elements. Array elements are used as keys, their frequency is tracked as the value.
+    array elements. Array elements are used as keys, their frequency is tracked as the value. Each element is
+    counted with a single lookup, and any iterable of hashable values (including a generator) can be passed in
+    place of a Dynamic Array.
 
-    :param da: the dynamic array used to determine mode
+    :param da: the dynamic array (or other iterable) used to determine mode
 
     :return: A tuple of an array containing the mode value, and the frequency that value occurs in the array. If
             multiple values occur at the highest frequency value, all of those values will be listed in the tuple array.
+            The frequency is 0 for an empty array.
     """
-    # initialize HashMap, mode value and array of values for return tuple and default value (1) if value is not
-    #   currently in the table
-    map = HashMap()
-    mode = 1
+    frequencies = HashMap(_expected_length(da), hash)
+    frequencies.set_load_factor_limits(1.0)
+    mode = 0
     mode_arr = DynamicArray()
-    element_val = 1
 
-    # iterate through each element in the provided array
-    for ele in range(da.length()):
+    # iterate through each element, keeping every value that has reached the highest frequency so far, in the order
+    #   they reached it
+    for element in da:
+        element_val = frequencies.increment(element)
 
-        # identify if value already in HashMap
-        if map.get(da[ele]) is not None:
+        if element_val == mode:
+            mode_arr.append(element)
+        elif element_val > mode:
+            mode_arr = DynamicArray()
+            mode_arr.append(element)
+            mode = element_val
 
-            # element is already in the table, increase its count (value) +1
-            element_val = map.get(da[ele]) + 1
+    return mode_arr, mode
 
-            # if element is current mode, add it to the mode array
-            if element_val == mode:
-                mode_arr.append(da[ele])
 
-            # if element is greater than current mode, overwrite current element as mode value/frequency for remaining
-            #   comparisons
-            elif element_val > mode:
-                mode_arr = DynamicArray()
-                mode_arr.append(da[ele])
-                mode = element_val
+def find_top_k(values, k: int) -> DynamicArray:
+    """
+    Determines the k most frequent values of an iterable, counting every value in a single pass (see
+    count_frequencies()) and then keeping the k highest counts in a heap.
 
-        # add or update element/frequency, key/value pairs
-        map.put(da[ele], element_val)
-        element_val = 1
+    :param values: an iterable of hashable values, such as a Dynamic Array or a generator
+    :param k: the number of values to return
 
-    # if mode never increases greater than 1, all values in the dynamic array occur with
-    #   equal frequency and all are mode value
-    if mode == 1:
-        mode_arr = da
+    :return: a Dynamic Array of (value, frequency) tuples, most frequent first, with fewer than k tuples if there are
+            fewer than k distinct values. Values with equal frequencies are in no particular order.
+    """
+    frequencies = count_frequencies(values)
+    return DynamicArray(heapq.nlargest(k, frequencies.items(), key=itemgetter(1)))
 
-    return mode_arr, mode
 
 # These tests were provided by the instructional staff to help with debugging and implementing the HashMap.
 # None of the below code was written by me.
@@ -537,3 +947,125 @@ if __name__ == "__main__":
         da = DynamicArray(case)
         mode, frequency = find_mode(da)
         print(f"Input: {da}\nMode : {mode}, Frequency: {frequency}\n")
+
+
+# --------------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+
+    from hash_functions import fnv1a
+
+    # the chain walks from before LinkedList.upsert(), which put(), get() and remove() were built on: a hit walks the
+    #   chain twice, once in contains() to check for the key and once more to use the node
+    def two_walk_get(hash_map: HashMap, key: str, hash: int) -> object:
+        """The get() from before: check for the key with contains(), then walk the chain again to read its value."""
+        bucket = hash_map._buckets[hash_map._bucket_index(hash, hash_map._capacity)]
+        if bucket.contains(key, hash) is not None:
+            return bucket.contains(key, hash).value
+
+    def two_walk_put(hash_map: HashMap, key: str, value: object, hash: int) -> None:
+        """The put() from before: check for the key with contains(), then walk again to update it or insert it."""
+        bucket = hash_map._buckets[hash_map._bucket_index(hash, hash_map._capacity)]
+        if bucket.contains(key, hash) is not None:
+            bucket.contains(key, hash).value = value
+        else:
+            bucket.insert(key, value, hash)
+            hash_map._size += 1
+
+    def two_walk_remove(hash_map: HashMap, key: str, hash: int) -> None:
+        """The remove() from before: walk the chain with contains() to check for the key, and again to unlink it."""
+        bucket = hash_map._buckets[hash_map._bucket_index(hash, hash_map._capacity)]
+        if bucket.contains(key, hash) is not None:
+            bucket.remove(key, hash)
+            hash_map._size -= 1
+
+    class CountingNode(SLNode):
+        """
+        An SLNode that counts how many times a chain walk visits it. Every walk compares the stored hash of each node
+        it passes before the key, so reading the hash counts as one visit.
+        """
+
+        __slots__ = ()
+        visits = 0
+
+        @property
+        def hash(self) -> int:
+            """Count the visit and return the stored hash."""
+            CountingNode.visits += 1
+            return SLNode.hash.__get__(self)
+
+        @hash.setter
+        def hash(self, hash: int) -> None:
+            """Store the hash."""
+            SLNode.hash.__set__(self, hash)
+
+    def counted_visits(chain_length: int, operation) -> int:
+        """
+        Build a HashMap with one chain of CountingNodes that all share hash 0, run an operation on it, and return the
+        number of nodes the operation visited. 'key0' is inserted first, so it is the last node of the chain. The
+        operations take the hash as an argument, like the methods put(), get() and remove() are built on.
+        """
+        m = HashMap(11, fnv1a)
+        bucket = m._buckets[m._bucket_index(0, m._capacity)]
+        for i in range(chain_length):
+            bucket.insert_node(CountingNode(f"key{i}", i, hash=0))
+        m._size = chain_length
+
+        CountingNode.visits = 0
+        operation(m)
+        return CountingNode.visits
+
+    print("\nBENCHMARK - nodes visited per operation on a 16 node chain, contains() first vs a single walk")
+    print("---------------------------------------------------------------------------------------------")
+    chain_length = 16
+    for name, before, after in (
+            ('get hit', lambda m: two_walk_get(m, 'key0', 0), lambda m: m._find_node('key0', 0)),
+            ('get miss', lambda m: two_walk_get(m, 'missing', 0), lambda m: m._find_node('missing', 0)),
+            ('update', lambda m: two_walk_put(m, 'key0', 1, 0), lambda m: m._put_hashed('key0', 1, 0)),
+            ('insert', lambda m: two_walk_put(m, 'new', 1, 0), lambda m: m._put_hashed('new', 1, 0)),
+            ('remove hit', lambda m: two_walk_remove(m, 'key0', 0), lambda m: m._remove_hashed('key0', 0)),
+            ('remove miss', lambda m: two_walk_remove(m, 'missing', 0), lambda m: m._remove_hashed('missing', 0))):
+        visits = counted_visits(chain_length, before), counted_visits(chain_length, after)
+
+        # every operation now walks the chain once, to its last node or off its end
+        assert visits[1] == chain_length, (name, visits)
+        print(f"{name:>11}: {visits[0]:>2} -> {visits[1]:>2} nodes")
+
+    def fastest(operation, pairs) -> float:
+        """Return the best of seven timings of an operation over every key and hash, per call."""
+        best = float('inf')
+        for _ in range(7):
+            start = time.perf_counter()
+            for key, hash in pairs:
+                operation(key, hash)
+            best = min(best, time.perf_counter() - start)
+        return best / len(pairs)
+
+    # the hits walk half as many nodes now; a remove miss walked the chain once before too, in contains(), and
+    #   comes out a few percent slower, since LinkedList.remove() moves a trailing pointer along with every node it
+    #   passes so that it can unlink the match, which contains() does not need
+    print("\nBENCHMARK - put() and remove() on long chains, contains() first vs a single walk")
+    print("---------------------------------------------------------------------------------")
+    capacity = 101
+    for chain_length in (4, 16, 64):
+        # the hashes are computed up front so only the chain walks are timed, and no load factor limits are set,
+        #   so the table keeps its capacity and every chain grows to chain_length entries
+        pairs = [(key, fnv1a(key)) for key in (f"key{i}" for i in range(capacity * chain_length))]
+        timings = []
+        for put, remove in ((two_walk_put, two_walk_remove), (HashMap._put_hashed, HashMap._remove_hashed)):
+            m = HashMap(capacity, fnv1a)
+            for key, hash in pairs:
+                put(m, key, 0, hash)
+            update = fastest(lambda key, hash: put(m, key, 1, hash), pairs)
+            miss = fastest(lambda key, hash: remove(m, 'missing' + key, hash), pairs)
+
+            start = time.perf_counter()
+            for key, hash in pairs:
+                remove(m, key, hash)
+            timings.append((update, miss, (time.perf_counter() - start) / len(pairs)))
+            assert m.get_size() == 0
+
+        print(f"{chain_length:>2} entries per bucket: " + ", ".join(
+            f"{name} {before * 1e6:5.2f} -> {after * 1e6:5.2f} us"
+            for name, before, after in zip(('update', 'remove miss', 'remove hit'), *timings)))
@@ -0,0 +1,376 @@
+# Description: This file contains a HashMap that spreads its keys over several worker processes, so that bulk loads
+#               and lookups can use more than one core. Each worker owns one shard, an ordinary
+#               hash_map_oa.HashMap, and the parent process only decides which shard a key belongs to. Batched
+#               operations split a batch into one plain list of keys (and values) per shard, send every shard its
+#               part before waiting for any of them, and put the replies back in the original order, so each shard
+#               is pickled to once per batch no matter how many keys it receives. Running this file benchmarks bulk
+#               puts and gets across shard counts against a single in-process map.
+
+
+import multiprocessing
+import os
+
+import hash_map_oa
+from a6_include import DynamicArray, HashMapMixin, hash_function_1
+
+
+def _serve_shard(connection, capacity: int, function) -> None:
+    """
+    Worker process loop: owns one shard and answers requests from the parent until it is told to close. Every
+    request gets exactly one reply, a (True, result) tuple, or (False, exception) if the request failed.
+    """
+    shard = hash_map_oa.HashMap(capacity, function)
+
+    while True:
+        request, *arguments = connection.recv()
+        if request == 'close':
+            break
+
+        try:
+            if request == 'put_many':
+                keys, values = arguments
+                shard.put_many(DynamicArray(list(zip(keys, values))))
+                result = None
+            elif request == 'get_many':
+                result = list(shard.get_many(DynamicArray(arguments[0])))
+            elif request == 'lookup_many':
+                result = [(shard.contains_key(key), shard.get(key)) for key in arguments[0]]
+            elif request == 'contains_many':
+                result = [shard.contains_key(key) for key in arguments[0]]
+            elif request == 'remove_many':
+                size = shard.get_size()
+                shard.remove_many(DynamicArray(arguments[0]))
+                result = size - shard.get_size()
+            elif request == 'stats':
+                result = shard.get_size(), shard.get_capacity()
+            elif request == 'items':
+                result = list(shard.items())
+            elif request == 'clear':
+                result = shard.clear()
+            else:
+                raise ValueError(f"unknown request {request!r}")
+        except Exception as error:
+            connection.send((False, error))
+        else:
+            connection.send((True, result))
+
+    connection.close()
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function=hash_function_1, shards: int = None) -> None:
+        """
+        Initialize new HashMap split over the given number of worker processes (one per CPU by default), each owning
+        an open addressing shard with an equal part of the capacity. The hash function must be picklable, such as a
+        module-level function, since each worker needs its own copy.
+        """
+        shards = shards or os.cpu_count() or 1
+        self._connections = []
+        self._workers = []
+
+        for _ in range(shards):
+            parent_end, worker_end = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=_serve_shard,
+                                             args=(worker_end, max(capacity // shards, 1), function),
+                                             daemon=True)
+            worker.start()
+            worker_end.close()
+            self._connections.append(parent_end)
+            self._workers.append(worker)
+
+    def __enter__(self) -> "HashMap":
+        """Use the HashMap in a with statement, which closes the workers on exit."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the workers at the end of a with statement."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stops every worker process. The HashMap cannot be used afterwards.
+        """
+        for connection in self._connections:
+            connection.send(('close',))
+            connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections, self._workers = [], []
+
+    def get_shard_count(self) -> int:
+        """
+        Return the number of shards (worker processes)
+        """
+        return len(self._connections)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(size for size, _ in self._broadcast('stats'))
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map, the total over all shards
+        """
+        return sum(capacity for _, capacity in self._broadcast('stats'))
+
+    # ------------------------------------------------------------------ #
+
+    def _request(self, messages: dict) -> dict:
+        """
+        Sends each shard its message, then collects the replies. Every reply to a message that was sent is read
+        before any failure is raised, so no reply is left in a pipe to be taken for the reply to a later request.
+
+        :param messages: a dictionary from shard number to the message for that shard
+
+        :return: a dictionary from shard number to the shard's reply, raising the first worker's exception instead
+            if any request failed
+        """
+        sent = []
+        try:
+            for shard, message in messages.items():
+                self._connections[shard].send(message)
+                sent.append(shard)
+        finally:
+            replies = [self._connections[shard].recv() for shard in sent]
+
+        for succeeded, result in replies:
+            if not succeeded:
+                raise result
+        return {shard: result for shard, (_, result) in zip(sent, replies)}
+
+    def _broadcast(self, request: str) -> list:
+        """
+        Sends a request without arguments to every shard, then collects the replies.
+
+        :param request: the name of the request
+
+        :return: a list with the reply of each shard, in shard order
+        """
+        return list(self._request({shard: (request,) for shard in range(len(self._connections))}).values())
+
+    def _scatter(self, request: str, keys: list, values: list = None) -> tuple:
+        """
+        Splits a batch of keys (and their values) into one list per shard, sends every shard that received keys its
+        part, and then collects the replies. Every shard works on its part at the same time.
+
+        :param request: the name of the request
+        :param keys: a list of keys
+        :param values: a list of values in the same order as the keys, or None if the request takes no values
+
+        :return: a tuple of the per-shard lists of positions in the batch and the per-shard replies (None for a
+            shard that received no keys)
+        """
+        # the shard for a key is picked with the built-in hash(), which is fast and consistent within the parent
+        #   process; each shard hashes its keys again with the HashMap's hash function
+        count = len(self._connections)
+        positions = [[] for _ in range(count)]
+        for position, key in enumerate(keys):
+            positions[hash(key) % count].append(position)
+
+        messages = {}
+        for shard, shard_positions in enumerate(positions):
+            if shard_positions:
+                messages[shard] = (request, [keys[position] for position in shard_positions])
+                if values is not None:
+                    messages[shard] += ([values[position] for position in shard_positions],)
+
+        replies = self._request(messages)
+        return positions, [replies.get(shard) for shard in range(count)]
+
+    def _gather(self, request: str, keys: list) -> list:
+        """
+        Runs a request that returns one result per key on every shard, and puts the results back in batch order.
+
+        :param request: the name of the request
+        :param keys: a list of keys
+
+        :return: a list of results in the same order as the keys
+        """
+        results = [None] * len(keys)
+        positions, replies = self._scatter(request, keys)
+        for shard_positions, reply in zip(positions, replies):
+            for position, result in zip(shard_positions, reply or ()):
+                results[position] = result
+        return results
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        self._scatter('put_many', [key], [value])
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch, with every shard placing its own part of the batch at the
+        same time.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = [pair[0] for pair in pairs]
+        values = [pair[1] for pair in pairs]
+        self._scatter('put_many', keys, values)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        found, value = self._gather('lookup_many', [key])[0]
+        return value if found else default
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, with every shard looking up its own part of the batch
+        at the same time.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        return DynamicArray(self._gather('get_many', list(keys)))
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._gather('contains_many', [key])[0]
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._scatter('remove_many', [key])
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, with every shard removing its own part of the batch at the
+        same time. Keys that are not in the HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        self._scatter('remove_many', list(keys))
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity), over all shards.
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        stats = self._broadcast('stats')
+        return sum(size for size, _ in stats) / sum(capacity for _, capacity in stats)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every shard. The underlying capacity of the shards is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._broadcast('clear')
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, one shard after another. Each shard's pairs are
+        copied to the parent process when the generator reaches that shard.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        for shard in range(len(self._connections)):
+            yield from self._request({shard: ('items',)})[shard]
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        found, value = self._gather('lookup_many', [key])[0]
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        _, replies = self._scatter('remove_many', [key])
+        if not any(replies):
+            raise KeyError(key)
+
+
+# ------------------- REGRESSION CHECKS -------------------------------- #
+
+if __name__ == "__main__":
+
+    print("REGRESSION - the HashMap keeps working after a worker fails a request")
+    print("----------------------------------------------------------------------")
+    with HashMap(64, hash_function_1, shards=2) as m:
+        pairs = DynamicArray([(f"key{i}", i) for i in range(20)])
+
+        # hash_function_1 only takes str keys, so the first shard, which gets the int key 0, fails the request,
+        #   while the second one places its part of the batch and replies after the first
+        try:
+            m.put_many(DynamicArray(list(pairs) + [(0, None)]))
+        except TypeError:
+            pass
+        m.put_many(pairs)
+        print(m.get_size() == 20, list(m.get_many(DynamicArray([f"key{i}" for i in range(20)]))) == list(range(20)))
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import time
+
+    from hash_functions import fnv1a
+
+    print()
+    count = 200_000
+    pairs = DynamicArray([(f"customer:{i:08d}", i) for i in range(count)])
+    keys = DynamicArray([pair[0] for pair in pairs])
+    print(f"{count} keys, hashed with fnv1a, {os.cpu_count()} CPUs")
+
+    start = time.perf_counter()
+    single = hash_map_oa.HashMap(2 * count, fnv1a)
+    single.put_many(pairs)
+    put_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single.get_many(keys)
+    print(f"{'in-process':>12}: put_many {put_time:6.2f}s, get_many {time.perf_counter() - start:6.2f}s")
+
+    for shards in sorted({1, 2, 4, 8, os.cpu_count() or 1}):
+        with HashMap(2 * count, fnv1a, shards=shards) as m:
+            start = time.perf_counter()
+            m.put_many(pairs)
+            put_time = time.perf_counter() - start
+            start = time.perf_counter()
+            values = m.get_many(keys)
+            get_time = time.perf_counter() - start
+            assert list(values) == list(range(count)) and m.get_size() == count
+        print(f"{shards:>3} shards: put_many {put_time:6.2f}s, get_many {get_time:6.2f}s")
@@ -0,0 +1,565 @@
+# Description: This file contains an Open Addressing HashMap whose whole table lives in a single buffer, either a
+#               multiprocessing.shared_memory segment or an mmap'd file, so other processes can attach to it and look
+#               keys up in place instead of building their own copy. The buffer holds a small header, one
+#               fixed-size record per bucket (state, stored hash, and the offset and length of the key and value) and
+#               a heap the key and value bytes are appended to. A lookup follows the same quadratic probe sequence as
+#               hash_map_oa.HashMap and compares the key against the bytes in the buffer, so nothing is unpickled or
+#               copied until a value is returned. Capacity and heap size are fixed when the table is created; the
+#               process that creates the table fills it, and every process that attaches reads it.
+
+
+import mmap
+import os
+import struct
+import weakref
+from multiprocessing import shared_memory
+
+from a6_include import HashMapMixin, next_prime
+from hash_functions import get_hash_function
+
+
+class SharedTableError(Exception):
+    pass
+
+
+MAGIC = b'HMSHARE1'
+
+# header: magic, capacity, size, tombstones, bytes of heap in use, and the registry name of the hash function
+_HEADER = struct.Struct('<8sQQQQ16s8x')
+
+# bucket record: state, key type, value type, key length, value length, stored hash, key offset, value offset
+_SLOT = struct.Struct('<BBBxIIxxxxQQQ')
+
+# bucket states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# key and value types; a key's type is stored and compared along with its bytes, so a str key and a bytes key with
+#   the same UTF-8 bytes are different keys, as they are in a dict, while a float key with an integral value is
+#   stored as the equal int, so 1 and 1.0 are the same key
+_STR, _BYTES, _INT, _FLOAT, _NONE = range(5)
+
+# ints are stored in 8 bytes
+_INT_RANGE = range(-2 ** 63, 2 ** 63)
+
+# the built-in hash() differs between processes, so it cannot be used for a table other processes read
+_UNSHAREABLE_FUNCTIONS = ('builtin',)
+
+
+def _encode(item) -> tuple:
+    """Return the type code and bytes for a key or value."""
+    if isinstance(item, str):
+        return _STR, item.encode('utf-8')
+    if isinstance(item, (bytes, bytearray)):
+        return _BYTES, bytes(item)
+    if item is None:
+        return _NONE, b''
+    if isinstance(item, bool):
+        raise TypeError(f"cannot store {item!r} in a shared HashMap")
+    if isinstance(item, int):
+        if item not in _INT_RANGE:
+            raise TypeError(f"cannot store {item!r} in a shared HashMap, only ints that fit in 64 bits")
+        return _INT, item.to_bytes(8, 'little', signed=True)
+    if isinstance(item, float):
+        return _FLOAT, struct.pack('<d', item)
+    raise TypeError(f"cannot store {type(item).__name__} in a shared HashMap, only str, bytes, int, float and None")
+
+
+def _normalize_key(key) -> object:
+    """Return the equal int for a float key with an integral value that fits in 64 bits, or the key unchanged."""
+    if isinstance(key, float) and key.is_integer() and -2 ** 63 <= key < 2 ** 63:
+        return int(key)
+    return key
+
+
+def _decode(kind: int, data: memoryview) -> object:
+    """Turn the type code and bytes of a stored key or value back into an object."""
+    if kind == _STR:
+        return str(data, 'utf-8')
+    if kind == _BYTES:
+        return bytes(data)
+    if kind == _INT:
+        return int.from_bytes(data, 'little', signed=True)
+    if kind == _FLOAT:
+        return struct.unpack('<d', data)[0]
+    return None
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function: str = 'fnv1a', heap_size: int = None, path: str = None) -> None:
+        """
+        Create a new shared HashMap that uses quadratic probing for collision resolution. The table is placed in a
+        new shared memory segment, or in a new file mapped into memory if a path is given. The hash function is
+        given by its name in the hash_functions registry, so every process can look up the same function. The heap
+        holds heap_size bytes of keys and values, 64 bytes per bucket by default.
+        """
+        if function in _UNSHAREABLE_FUNCTIONS:
+            raise ValueError(f"hash function {function!r} is not the same in every process")
+        self._hash_function = get_hash_function(function)
+
+        # capacity must be a prime number
+        capacity = next_prime(capacity)
+        heap_size = heap_size if heap_size is not None else 64 * capacity
+        length = _HEADER.size + capacity * _SLOT.size + heap_size
+
+        # new shared memory and newly truncated files are zero filled, so every bucket starts out EMPTY
+        self._open(length, path, create=True)
+        _HEADER.pack_into(self._buffer, 0, MAGIC, capacity, 0, 0, 0, function.encode('ascii'))
+        self._read_header(writable=True)
+
+    @classmethod
+    def attach(cls, name: str = None, path: str = None) -> "HashMap":
+        """
+        Attach to a table created by another process, by the name of its shared memory segment or the path of its
+        file. The attached HashMap can only be read.
+        """
+        table = cls.__new__(cls)
+        table._open(None, path, create=False, name=name)
+        if bytes(table._buffer[:len(MAGIC)]) != MAGIC:
+            table.close()
+            raise SharedTableError("the buffer does not hold a shared HashMap")
+
+        function = _HEADER.unpack_from(table._buffer, 0)[5].rstrip(b'\0').decode('ascii')
+        table._hash_function = get_hash_function(function)
+        table._read_header(writable=False)
+        return table
+
+    def _open(self, length: int, path: str, create: bool, name: str = None) -> None:
+        """
+        Create or open the shared memory segment or file backing the table and keep a memoryview of it.
+        """
+        self._shared_memory, self._file, self._mmap = None, None, None
+
+        # views handed out by get_buffer() that are still alive, released by close()
+        self._views = weakref.WeakSet()
+
+        if path is not None:
+            if create:
+                self._file = open(path, 'w+b')
+                self._file.truncate(length)
+                self._mmap = mmap.mmap(self._file.fileno(), length)
+            else:
+                self._file = open(path, 'rb')
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = memoryview(self._mmap)
+            return
+
+        if create:
+            self._shared_memory = shared_memory.SharedMemory(create=True, size=length)
+        else:
+            try:
+                self._shared_memory = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # before Python 3.13 attaching always registers the segment with the resource tracker; child
+                #   processes share their parent's tracker so this is harmless for them, but an unrelated process
+                #   that attaches removes the segment's name when it exits
+                self._shared_memory = shared_memory.SharedMemory(name=name)
+        self._buffer = self._shared_memory.buf
+
+    def _read_header(self, writable: bool) -> None:
+        """
+        Read the fixed layout of the table from its header.
+        """
+        self._writable = writable
+        self._capacity = _HEADER.unpack_from(self._buffer, 0)[1]
+        self._heap = _HEADER.size + self._capacity * _SLOT.size
+        self._heap_size = len(self._buffer) - self._heap
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return _HEADER.unpack_from(self._buffer, 0)[2]
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    @property
+    def name(self) -> str:
+        """
+        The name other processes pass to attach() to reach this table, None for a table backed by a file
+        """
+        return self._shared_memory.name if self._shared_memory is not None else None
+
+    # ------------------------------------------------------------------ #
+
+    def _update_header(self, size: int = 0, tombstones: int = 0, heap_used: int = 0) -> None:
+        """
+        Add the given amounts to the size, tombstone and heap counters in the header.
+        """
+        magic, capacity, old_size, old_tombstones, old_heap_used, function = _HEADER.unpack_from(self._buffer, 0)
+        _HEADER.pack_into(self._buffer, 0, magic, capacity, old_size + size, old_tombstones + tombstones,
+                          old_heap_used + heap_used, function)
+
+    def _store(self, data: bytes) -> int:
+        """
+        Append bytes to the heap.
+
+        :param data: the bytes to store
+
+        :return: the offset of the bytes in the buffer
+        """
+        heap_used = _HEADER.unpack_from(self._buffer, 0)[4]
+        if heap_used + len(data) > self._heap_size:
+            raise SharedTableError("the heap of the shared HashMap is full")
+
+        offset = self._heap + heap_used
+        self._buffer[offset:offset + len(data)] = data
+        self._update_header(heap_used=len(data))
+        return offset
+
+    def _check_writable(self) -> None:
+        """
+        Raise an error if this process attached to the table rather than creating it.
+        """
+        if not self._writable:
+            raise SharedTableError("an attached shared HashMap is read-only")
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated, in place if the
+        new value is no longer than the old one. The capacity is fixed, so adding a key that would bring the table
+        load above 0.5 raises SharedTableError, as does running out of heap.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table, a str, bytes, int,
+            float or None
+
+        :return: no return value
+        """
+        self._check_writable()
+        key = _normalize_key(key)
+        key_type, key_bytes = _encode(key)
+        value_type, value_bytes = _encode(value)
+        hash = self._hash_function(key) & 0xFFFFFFFFFFFFFFFF
+
+        slot = self._find_slot(key_type, key_bytes, hash)
+        if slot is not None:
+            _, stored_key_type, _, key_length, value_length, _, key_offset, value_offset = \
+                _SLOT.unpack_from(self._buffer, slot)
+            if len(value_bytes) <= value_length:
+                self._buffer[value_offset:value_offset + len(value_bytes)] = value_bytes
+            else:
+                value_offset = self._store(value_bytes)
+            _SLOT.pack_into(self._buffer, slot, LIVE, stored_key_type, value_type, key_length, len(value_bytes),
+                            hash, key_offset, value_offset)
+            return
+
+        if (self.get_size() + 1) / self._capacity > 0.5:
+            raise SharedTableError("the shared HashMap is full, create it with a larger capacity")
+
+        key_offset = self._store(key_bytes)
+        value_offset = self._store(value_bytes)
+
+        # the free slot is written in one go, with its state, so a reader never sees half a record as live
+        slot = self._free_slot(hash)
+        reused_tombstone = self._buffer[slot] == TOMBSTONE
+        _SLOT.pack_into(self._buffer, slot, LIVE, key_type, value_type, len(key_bytes), len(value_bytes), hash,
+                        key_offset, value_offset)
+        self._update_header(size=1, tombstones=-1 if reused_tombstone else 0)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap. The key is compared in place against
+        the bytes in the shared buffer, and only the value that is returned is copied out of it.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        slot = self._find_key(key)
+        if slot is None:
+            return default
+
+        _, _, value_type, _, value_length, _, _, value_offset = _SLOT.unpack_from(self._buffer, slot)
+        return _decode(value_type, self._buffer[value_offset:value_offset + value_length])
+
+    def get_buffer(self, key: str) -> memoryview:
+        """
+        Returns the stored bytes of the value for a key as a read-only view of the shared buffer, without copying.
+        The view can be used until the HashMap is closed, which releases it; it can be released earlier with its
+        release() method or a with statement.
+
+        :param key: the key of the value that will be returned
+
+        :return: a memoryview of the value's bytes, returns None if the key is not found
+        """
+        slot = self._find_key(key)
+        if slot is None:
+            return None
+
+        _, _, _, _, value_length, _, _, value_offset = _SLOT.unpack_from(self._buffer, slot)
+        view = self._buffer[value_offset:value_offset + value_length].toreadonly()
+        self._views.add(view)
+        return view
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_key(key) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key by marking its bucket as a tombstone.
+        The heap space of the key and value is not reused.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._check_writable()
+        slot = self._find_key(key)
+        if slot is not None:
+            self._buffer[slot] = TOMBSTONE
+            self._update_header(size=-1, tombstones=1)
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self.get_size() / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value. Buckets holding a tombstone are
+        not counted as empty.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        _, _, size, tombstones, _, _ = _HEADER.unpack_from(self._buffer, 0)
+        return self._capacity - size - tombstones
+
+    def _find_key(self, key) -> int:
+        """
+        Hashes and encodes a key and locates its bucket record. A key the table cannot store is never found.
+
+        :param key: the key to search for in the HashMap
+
+        :return: the offset of the live bucket record holding the key, returns None if the key is not found
+        """
+        key = _normalize_key(key)
+        try:
+            key_type, key_bytes = _encode(key)
+        except TypeError:
+            return None
+        return self._find_slot(key_type, key_bytes, self._hash_function(key) & 0xFFFFFFFFFFFFFFFF)
+
+    def _find_slot(self, key_type: int, key_bytes: bytes, hash: int) -> int:
+        """
+        Follows the quadratic probe sequence for a key, skipping tombstones and stopping at the first empty bucket.
+        Stored hashes and key types are compared first, and the key is compared against its bytes in the buffer
+        without copying.
+
+        :param key_type: the type code of the key
+        :param key_bytes: the stored form of the key
+        :param hash: the value of the HashMap's hash function for the key, reduced to 64 bits
+
+        :return: the offset of the live bucket record holding the key, returns None if the key is not found
+        """
+        buffer, capacity = self._buffer, self._capacity
+        initial = hash % capacity
+
+        # a probe sequence can visit at most capacity buckets before it starts repeating itself
+        for quad_probe in range(capacity):
+            slot = _HEADER.size + ((initial + quad_probe ** 2) % capacity) * _SLOT.size
+            state, stored_key_type, _, key_length, _, stored_hash, key_offset, _ = _SLOT.unpack_from(buffer, slot)
+
+            if state == EMPTY:
+                return None
+            if (state == LIVE and stored_hash == hash and stored_key_type == key_type
+                    and key_length == len(key_bytes) and buffer[key_offset:key_offset + key_length] == key_bytes):
+                return slot
+
+        return None
+
+    def _free_slot(self, hash: int) -> int:
+        """
+        Follows the quadratic probe sequence for a hash until it reaches an empty or tombstone bucket.
+
+        :param hash: the value of the HashMap's hash function for the key, reduced to 64 bits
+
+        :return: the offset of the bucket record that can take a new entry
+        """
+        initial = hash % self._capacity
+        for quad_probe in range(self._capacity):
+            slot = _HEADER.size + ((initial + quad_probe ** 2) % self._capacity) * _SLOT.size
+            if self._buffer[slot] != LIVE:
+                return slot
+
+        raise SharedTableError("no free bucket in the probe sequence")
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once and skipping empty buckets
+        and tombstones.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        buffer = self._buffer
+        for bucket in range(self._capacity):
+            state, key_type, value_type, key_length, value_length, _, key_offset, value_offset = \
+                _SLOT.unpack_from(buffer, _HEADER.size + bucket * _SLOT.size)
+            if state == LIVE:
+                yield (_decode(key_type, buffer[key_offset:key_offset + key_length]),
+                       _decode(value_type, buffer[value_offset:value_offset + value_length]))
+
+    def close(self) -> None:
+        """
+        Detaches this process from the table, releasing every view from get_buffer() that is still in use. The
+        table itself stays available to other processes; the creator removes a shared memory segment with unlink().
+
+        :param: None
+
+        :return: no return value
+        """
+        # the buffer cannot be unmapped while views of it are exported
+        for view in list(self._views):
+            view.release()
+
+        if self._shared_memory is not None:
+            self._buffer = None
+            self._shared_memory.close()
+        else:
+            self._buffer.release()
+            self._mmap.close()
+            self._file.close()
+
+    def unlink(self) -> None:
+        """
+        Removes the shared memory segment of a table created by this process, once every process has closed it.
+        Tables backed by a file are left for the caller to delete.
+
+        :param: None
+
+        :return: no return value
+        """
+        if self._shared_memory is not None:
+            self._shared_memory.unlink()
+
+    def __enter__(self) -> "HashMap":
+        """Use the HashMap in a with statement, which closes it on exit."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the HashMap at the end of a with statement."""
+        self.close()
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        slot = self._find_key(key)
+        if slot is None:
+            raise KeyError(key)
+
+        _, _, value_type, _, value_length, _, _, value_offset = _SLOT.unpack_from(self._buffer, slot)
+        return _decode(value_type, self._buffer[value_offset:value_offset + value_length])
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        self._check_writable()
+        slot = self._find_key(key)
+        if slot is None:
+            raise KeyError(key)
+        self._buffer[slot] = TOMBSTONE
+        self._update_header(size=-1, tombstones=1)
+
+
+# ------------------- REGRESSION CHECKS -------------------------------- #
+
+if __name__ == "__main__":
+
+    print("REGRESSION - looking up keys the table cannot store, and float keys equal to ints")
+    print("---------------------------------------------------------------------------------")
+    with HashMap(11) as m:
+        m.put(1, 'one')
+        print(m.get(True) is None, m.contains_key(True) is False, m.contains_key(2 ** 70) is False, True not in m)
+        try:
+            m[[1]]
+        except KeyError:
+            print(True)
+        try:
+            m.put(2 ** 70, 'too large')
+        except TypeError:
+            print(True)
+
+        m.put(2.0, 'two')
+        print(m[1.0] == 'one', m.get(2) == 'two', m.get_size() == 2, sorted(m.keys()) == [1, 2])
+        m.unlink()
+
+
+# ------------------- BENCHMARK ---------------------------------------- #
+
+if __name__ == "__main__":
+    import multiprocessing
+    import tempfile
+    import time
+
+    import hash_map_oa
+    from hash_functions import fnv1a
+
+    count, workers = 100_000, 4
+    pairs = [(f"sku:{i:08d}", i * 3) for i in range(count)]
+
+    def rebuild_and_look_up(_) -> float:
+        """Worker that builds its own hash_map_oa.HashMap, then looks every key up."""
+        start = time.perf_counter()
+        m = hash_map_oa.HashMap(2 * count, fnv1a)
+        for key, value in pairs:
+            m.put(key, value)
+        ready = time.perf_counter() - start
+        assert all(m.get(key) == value for key, value in pairs[::100])
+        return ready
+
+    def attach_and_look_up(location: tuple) -> float:
+        """Worker that attaches to the shared table, then looks every key up."""
+        start = time.perf_counter()
+        m = HashMap.attach(*location)
+        ready = time.perf_counter() - start
+        assert all(m.get(key) == value for key, value in pairs[::100])
+        m.close()
+        return ready
+
+    print()
+    start = time.perf_counter()
+    shared = HashMap(2 * count)
+    for key, value in pairs:
+        shared.put(key, value)
+    print(f"built the shared table once in {time.perf_counter() - start:.2f}s "
+          f"({len(shared._buffer) / 2 ** 20:.1f} MiB)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table.bin')
+        on_file = HashMap(2 * count, path=path)
+        for key, value in pairs:
+            on_file.put(key, value)
+
+        with multiprocessing.Pool(workers) as pool:
+            print(f"{workers} workers rebuilding their own map: "
+                  f"{max(pool.map(rebuild_and_look_up, range(workers))):.3f}s until ready")
+            print(f"{workers} workers attaching to shared memory: "
+                  f"{max(pool.map(attach_and_look_up, [(shared.name, None)] * workers)):.4f}s until ready")
+            print(f"{workers} workers mapping the file: "
+                  f"{max(pool.map(attach_and_look_up, [(None, path)] * workers)):.4f}s until ready")
+        on_file.close()
+
+    shared.close()
+    shared.unlink()
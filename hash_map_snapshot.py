@@ -0,0 +1,213 @@
+# Description: This file contains the binary snapshot format used by the save() and load() methods of the Open
+#               Addressing and Separate Chaining HashMaps. A snapshot records the table as it is laid out in memory:
+#               the capacity and capacity mode, the bucket index and stored hash of every entry, tombstone flags,
+#               and the identity of the hash function, followed by the keys and values pickled in one block.
+#               Loading maps the file into memory and puts every entry straight back into its recorded bucket, so no
+#               key is hashed or probed again. A few keys are hashed once as a check, and if their hashes no longer
+#               match (for example str keys with the built-in hash(), which changes between processes) the caller
+#               rebuilds the table from the keys instead. Loading unpickles the keys and values and imports the
+#               recorded hash function, both of which can run arbitrary code, so only snapshots from a trusted
+#               source should be loaded.
+
+
+import importlib
+import mmap
+import pickle
+import struct
+from contextlib import contextmanager
+from functools import partial
+
+from hash_functions import HASH_FUNCTIONS, get_hash_function
+
+
+MAGIC = b'HMSNAP02'
+
+# the kind of HashMap a snapshot was taken from
+KIND_OA = 0
+KIND_SC = 1
+
+# header: magic, kind, power-of-two flag, typecode of the hash array, number of buckets, number of entries, length
+#   of the pickled keys and values, and length of the hash function's name, padded to 48 bytes so the name and the
+#   arrays after it start on 8-byte boundaries
+_HEADER = struct.Struct('<8sBBcxQQQH10x')
+
+# number of entries whose hashes are recomputed on load to check the hash function still gives the same hashes
+_CHECKED_HASHES = 8
+
+
+def hash_function_name(function) -> str:
+    """
+    Return a name that identifies a hash function in a snapshot: its name in the hash_functions registry (with the
+    seed, if one was bound), or its module and qualified name for any other function that can be imported again.
+    Returns an empty string for functions that cannot be found again, such as lambdas.
+    """
+    seed = 0
+    if isinstance(function, partial) and not function.args and set(function.keywords) == {'seed'}:
+        function, seed = function.func, function.keywords['seed']
+
+    for name, registered in HASH_FUNCTIONS.items():
+        if registered is function:
+            return f"registry:{name}:{seed}"
+
+    module, qualified_name = getattr(function, '__module__', None), getattr(function, '__qualname__', '')
+    if seed or module is None or module == '__main__' or '<' in qualified_name:
+        return ''
+    return f"{module}:{qualified_name}"
+
+
+def resolve_hash_function(name: str):
+    """
+    Return the hash function identified by a name from hash_function_name().
+    """
+    if not name:
+        raise ValueError("the snapshot's hash function cannot be found again, pass the function to load()")
+
+    if name.startswith('registry:'):
+        _, registered, seed = name.split(':')
+        return get_hash_function(registered, int(seed))
+
+    module, qualified_name = name.split(':')
+    function = importlib.import_module(module)
+    for attribute in qualified_name.split('.'):
+        function = getattr(function, attribute)
+    return function
+
+
+def _hash_typecode(hashes: list) -> bytes:
+    """Pick the narrowest fixed-width array type that holds every hash, or b'o' to pickle them."""
+    if all(-2 ** 63 <= hash < 2 ** 63 for hash in hashes):
+        return b'q'
+    if all(0 <= hash < 2 ** 64 for hash in hashes):
+        return b'Q'
+    return b'o'
+
+
+def write_snapshot(path: str, kind: int, capacity: int, power_of_two: bool, function,
+                   buckets: list, hashes: list, flags: bytearray, keys: list, values: list) -> None:
+    """
+    Write a snapshot of a table to a file.
+
+    :param path: the file to write
+    :param kind: KIND_OA or KIND_SC
+    :param capacity: the number of buckets
+    :param power_of_two: whether the table uses power-of-two capacity mode
+    :param function: the table's hash function
+    :param buckets: the bucket index of every entry
+    :param hashes: the stored hash of every entry
+    :param flags: one byte per entry, 1 for a tombstone
+    :param keys: the key of every entry
+    :param values: the value of every entry
+
+    :return: no return value
+    """
+    name = hash_function_name(function).encode('utf-8')
+    typecode = _hash_typecode(hashes)
+    objects = pickle.dumps((keys, values, hashes if typecode == b'o' else None), protocol=pickle.HIGHEST_PROTOCOL)
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, kind, power_of_two, typecode, capacity, len(buckets), len(objects),
+                                len(name)))
+
+        # the name is padded to a multiple of 8 bytes so the arrays after it are aligned
+        file.write(name + bytes(-len(name) % 8))
+        file.write(struct.pack(f'<{len(buckets)}Q', *buckets))
+        if typecode != b'o':
+            file.write(struct.pack(f'<{len(hashes)}{typecode.decode()}', *hashes))
+        file.write(bytes(flags) + bytes(-len(flags) % 8))
+        file.write(objects)
+
+
+class Snapshot:
+    """
+    The contents of a snapshot file. The bucket, hash and flag arrays are views of the mapped file and are only
+    valid inside the open_snapshot() block.
+    """
+
+    def __init__(self, buffer: memoryview) -> None:
+        """Read the header of a mapped snapshot file and set up views of its arrays."""
+        magic, kind, power_of_two, typecode, capacity, count, objects_length, name_length = \
+            _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("the file is not a HashMap snapshot")
+
+        self.kind = kind
+        self.power_of_two = bool(power_of_two)
+        self.capacity = capacity
+        self.count = count
+
+        offset = _HEADER.size
+        self.function_name = str(buffer[offset:offset + name_length], 'utf-8')
+        offset += name_length + -name_length % 8
+
+        # if the rest of the file cannot be read, the views made so far are released here, since open_snapshot() has no
+        #   Snapshot to release them and the mapped file cannot be closed while a view of it exists
+        self.buckets = self.hashes = self.flags = None
+        try:
+            self.buckets = buffer[offset:offset + 8 * count].cast('Q')
+            offset += 8 * count
+            if typecode != b'o':
+                self.hashes = buffer[offset:offset + 8 * count].cast(typecode.decode())
+                offset += 8 * count
+            self.flags = buffer[offset:offset + count]
+            offset += count + -count % 8
+
+            self.keys, self.values, hashes = pickle.loads(buffer[offset:offset + objects_length])
+            if typecode == b'o':
+                self.hashes = hashes
+        except BaseException:
+            self.release()
+            raise
+
+    def check_kind(self, kind: int) -> None:
+        """Raise an error if the snapshot was taken from the other kind of HashMap."""
+        if self.kind != kind:
+            raise ValueError("the snapshot was taken from a different kind of HashMap")
+
+    def hashes_match(self, function) -> bool:
+        """
+        Hash the keys of a few live entries and compare them with the stored hashes, to check that the hash function
+        still gives the hashes the table was laid out with.
+        """
+        checked = 0
+        for index in range(self.count):
+            if checked == _CHECKED_HASHES:
+                break
+            if not self.flags[index]:
+                if function(self.keys[index]) != self.hashes[index]:
+                    return False
+                checked += 1
+        return True
+
+    def entries(self):
+        """Yield the bucket index, hash, tombstone flag, key and value of every entry, in file order."""
+        return zip(self.buckets, self.hashes, self.flags, self.keys, self.values)
+
+    def live_pairs(self):
+        """Yield the key and value of every entry that is not a tombstone."""
+        for _, _, tombstone, key, value in self.entries():
+            if not tombstone:
+                yield key, value
+
+    def release(self) -> None:
+        """Release the views of the mapped file."""
+        for view in (self.buckets, self.hashes, self.flags):
+            if isinstance(view, memoryview):
+                view.release()
+
+
+@contextmanager
+def open_snapshot(path: str):
+    """
+    Map a snapshot file into memory and yield its contents as a Snapshot, unmapping the file afterwards. The keys
+    and values are unpickled, so the file must come from a trusted source.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        buffer = memoryview(mapped)
+        snapshot = None
+        try:
+            snapshot = Snapshot(buffer)
+            yield snapshot
+        finally:
+            if snapshot is not None:
+                snapshot.release()
+            buffer.release()
@@ -0,0 +1,463 @@
+# Description: This file contains an Open Addressing HashMap modelled on SwissTable. Buckets are arranged in groups
+#               of 16, and every bucket has a one-byte control tag: empty, deleted, or the top 7 bits of the key's
+#               hash when the bucket is full. A lookup reads the 16 tags of a group as one integer and compares all
+#               of them against the key's tag at once with bit tricks, so keys are only compared in buckets whose tag
+#               already matches. Groups are probed linearly, and a search stops at the first group that still has an
+#               empty bucket. Because a probe rarely touches a key it does not want, the table can run at a 0.875
+#               load factor instead of 0.5. The public methods match hash_map_oa.HashMap.
+
+
+from array import array
+
+from a6_include import DynamicArray, HashMapMixin, hash_batch, mix_hash, next_prime
+
+
+# number of buckets whose control tags are compared together
+GROUP_WIDTH = 16
+
+# control tags, a full bucket stores the top 7 bits of its hash (0x00 - 0x7F) so the high bit marks a free bucket
+EMPTY = 0x80
+DELETED = 0xFE
+
+# a copy of the lowest and of the highest bit of every byte in a group, used to compare all 16 tags at once
+_LSB = int.from_bytes(b'\x01' * GROUP_WIDTH, 'little')
+_MSB = _LSB << 7
+
+
+def _match_tag(word: int, tag: int) -> int:
+    """
+    Return a mask with the high bit set in every byte of the group that holds the given tag. Bytes above a
+    match may be reported too, so every match still has its hash and key compared.
+    """
+    x = word ^ (tag * _LSB)
+    return (x - _LSB) & ~x & _MSB
+
+
+def _match_empty(word: int) -> int:
+    """Return a mask with the high bit set in every byte of the group holding EMPTY."""
+    return word & ~(word << 6) & _MSB
+
+
+def _match_free(word: int) -> int:
+    """Return a mask with the high bit set in every byte of the group holding EMPTY or DELETED."""
+    return word & _MSB
+
+
+class HashMap(HashMapMixin):
+    def __init__(self, capacity: int, function, max_load: float = 0.875) -> None:
+        """
+        Initialize new HashMap that uses grouped control tags for collision resolution. The table grows once the
+        load factor would pass max_load, which must be greater than 0 and less than 1.
+        """
+        # a full table would leave insertion searching forever for a free slot
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be greater than 0 and less than 1")
+
+        # the number of groups must be a prime number
+        self._groups = next_prime(-(-capacity // GROUP_WIDTH))
+        self._capacity = self._groups * GROUP_WIDTH
+        self._control, self._hashes, self._keys, self._values = self._allocate(self._capacity)
+
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+        self._max_load = max_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide the same output as hash_map_oa.HashMap
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._control[i] == EMPTY:
+                out += str(i) + ': None\n'
+            else:
+                out += f"{i}: K: {self._keys[i]} V: {self._values[i]} TS: {self._control[i] == DELETED}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _allocate(capacity: int) -> tuple:
+        """
+        Allocates the parallel arrays for a table with the given number of buckets, with every bucket empty.
+
+        :param capacity: the number of buckets, a multiple of GROUP_WIDTH
+
+        :return: a tuple of the control tag, stored hash, key and value arrays
+        """
+        return bytearray([EMPTY]) * capacity, array('Q', bytes(8 * capacity)), [None] * capacity, [None] * capacity
+
+    def _hash(self, key: str) -> int:
+        """
+        Hashes a key with the HashMap's hash function and mixes the result into 64 well spread bits. The tag comes
+        from the top bits of the hash, which the provided hash functions never reach without mixing.
+
+        :param key: the key to hash
+
+        :return: the mixed 64-bit hash of the key
+        """
+        return mix_hash(self._hash_function(key), 0)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Updates key/value pairs in a HashMap table. If the key does not exist in the table, it is added with the
+        associated value. If the key already exists in the table, the value for the key is updated. If adding the
+        key would push the table load past the maximum load factor, this method first doubles the capacity.
+        Otherwise, if live entries and deleted buckets together would pass it, this method first calls compact().
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with they key being added or updated in the table
+
+        :return: no return value
+        """
+        if (self._size + 1) / self._capacity > self._max_load:
+            self.resize_table(self._capacity * 2)
+        elif (self._size + self._tombstones + 1) / self._capacity > self._max_load:
+            self.compact()
+
+        self._put_hashed(key, value, self._hash(key))
+
+    def _put_hashed(self, key: str, value: object, hash: int) -> None:
+        """
+        Places or updates a key/value pair using an already computed (mixed) hash for the key. The table load is not
+        checked, callers are responsible for making sure there is room in the table.
+
+        :param key: the key to place or update in the table
+        :param value: the value associated with the key being added or updated in the table
+        :param hash: the mixed 64-bit hash of the key
+
+        :return: no return value
+        """
+        # if the key is already in the table, update the value associated with that key
+        slot = self._find_slot(key, hash)
+        if slot is not None:
+            self._values[slot] = value
+            return
+
+        # otherwise insert the key:value pair in the first empty or deleted bucket of its probe sequence
+        slot = self._free_slot(self._control, self._groups, hash)
+        if self._control[slot] == DELETED:
+            self._tombstones -= 1
+
+        self._control[slot] = hash >> 57
+        self._hashes[slot] = hash
+        self._keys[slot] = key
+        self._values[slot] = value
+        self._size += 1
+
+    def put_many(self, pairs: DynamicArray) -> None:
+        """
+        Places or updates every key/value pair in a batch. All keys are hashed up front, and the table is resized
+        at most once, to a capacity large enough for the whole batch, before the pairs are placed.
+
+        :param pairs: a Dynamic Array of (key, value) tuples
+
+        :return: no return value
+        """
+        keys = DynamicArray([pairs[index][0] for index in range(pairs.length())])
+        hashes = self._hash_many(keys)
+
+        # double the capacity until the whole batch fits under the maximum load factor, then resize once
+        capacity = self._capacity
+        while (self._size + self._tombstones + keys.length()) / capacity > self._max_load:
+            capacity *= 2
+        if capacity != self._capacity:
+            self.resize_table(capacity)
+
+        for index in range(keys.length()):
+            self._put_hashed(keys[index], pairs[index][1], hashes[index])
+
+    def table_load(self) -> float:
+        """
+        Calculates and returns the load factor of a HashMap. Table load is the number of elements divided by
+        the number of buckets (capacity).
+
+        :param: None
+
+        :return: a float value representing the table load
+        """
+        return self._size / self._capacity
+
+    def empty_buckets(self) -> int:
+        """
+        Determines the number of empty buckets in a HashMap and returns that value. Deleted buckets are not counted
+        as empty.
+
+        :param: None
+
+        :return: an integer representing the number of empty buckets in the HashMap
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def get_probe_stats(self) -> tuple:
+        """
+        Measures how many groups past its home group each entry sits, which is the number of extra groups a lookup
+        for its key has to read.
+
+        :param: None
+
+        :return: a tuple of the mean and the maximum group distance, (0, 0) for an empty HashMap
+        """
+        total, longest = 0, 0
+        for slot in range(self._capacity):
+            if self._control[slot] < EMPTY:
+                distance = (slot // GROUP_WIDTH - self._hashes[slot] % self._groups) % self._groups
+                total += distance
+                longest = max(longest, distance)
+
+        return (total / self._size if self._size else 0), longest
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Updates the capacity of the HashMap and re-maps existing values in the HashMap after resizing, using the
+        stored hashes so no key is hashed again. The new capacity can be larger or smaller than the current capacity,
+        as long as all elements fit under the maximum load factor; if they would not, the capacity is doubled until
+        they do. Deleted buckets are dropped.
+
+        Capacity is rounded up to a whole number of groups, and the number of groups must be a prime number.
+
+        :param new_capacity: the desired capacity for the HashMap
+
+        :return: no return value
+        """
+        # only resize if the desired capacity is large enough to fit all existing values
+        if new_capacity < self._size:
+            return
+
+        groups = next_prime(-(-new_capacity // GROUP_WIDTH))
+        while self._size / (groups * GROUP_WIDTH) > self._max_load:
+            groups = next_prime(groups * 2)
+
+        capacity = groups * GROUP_WIDTH
+        control, hashes, keys, values = self._allocate(capacity)
+        for slot in range(self._capacity):
+            if self._control[slot] < EMPTY:
+                hash = self._hashes[slot]
+                new_slot = self._free_slot(control, groups, hash)
+                control[new_slot] = self._control[slot]
+                hashes[new_slot] = hash
+                keys[new_slot] = self._keys[slot]
+                values[new_slot] = self._values[slot]
+
+        self._control, self._hashes, self._keys, self._values = control, hashes, keys, values
+        self._groups = groups
+        self._capacity = capacity
+        self._tombstones = 0
+
+    def compact(self) -> None:
+        """
+        Rebuilds the table at its current capacity, dropping every deleted bucket.
+
+        :param: None
+
+        :return: no return value
+        """
+        self.resize_table(self._capacity)
+
+    def get(self, key: str, default: object = None) -> object:
+        """
+        Returns the value associated with the provided key in the HashMap.
+
+        :param key: the key of the value that will be returned
+        :param default: the value to return if the key is not found
+
+        :return: the value object associated with the provided key, returns default (None) if the key is not found
+        """
+        slot = self._find_slot(key, self._hash(key))
+        if slot is not None:
+            return self._values[slot]
+        return default
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Determines if the provided key exists in the HashMap.
+
+        :param key: the key to look for in the HashMap
+
+        :return: True if the key exists, False if it does not exist
+        """
+        return self._find_slot(key, self._hash(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a key/value pair from the HashMap based on the provided key.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+
+        :return: no return value
+        """
+        self._remove_hashed(key, self._hash(key))
+
+    def get_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Returns the values associated with a batch of keys, hashing all of the keys up front.
+
+        :param keys: a Dynamic Array of keys to look up
+
+        :return: a Dynamic Array of values in the same order as the keys, None for any key that is not found
+        """
+        hashes = self._hash_many(keys)
+        values = DynamicArray()
+
+        for index in range(keys.length()):
+            slot = self._find_slot(keys[index], hashes[index])
+            values.append(self._values[slot] if slot is not None else None)
+
+        return values
+
+    def remove_many(self, keys: DynamicArray) -> None:
+        """
+        Removes the key/value pairs for a batch of keys, hashing all of the keys up front. Keys that are not in the
+        HashMap are ignored.
+
+        :param keys: a Dynamic Array of keys to remove
+
+        :return: no return value
+        """
+        hashes = self._hash_many(keys)
+
+        for index in range(keys.length()):
+            self._remove_hashed(keys[index], hashes[index])
+
+    def _remove_hashed(self, key: str, hash: int) -> bool:
+        """
+        Removes the key/value pair for a key using an already computed (mixed) hash. If the bucket's group still has
+        an empty bucket, no search ever continued past that group, so the bucket can simply become empty again.
+        Otherwise it is marked as deleted. Keys that are not in the HashMap are ignored.
+
+        :param key: the key of the key/value pair to remove from the HashMap
+        :param hash: the mixed 64-bit hash of the key
+
+        :return: True if the key was found and removed, False otherwise
+        """
+        slot = self._find_slot(key, hash)
+        if slot is None:
+            return False
+
+        start = slot - slot % GROUP_WIDTH
+        if _match_empty(int.from_bytes(self._control[start:start + GROUP_WIDTH], 'little')):
+            self._control[slot] = EMPTY
+        else:
+            self._control[slot] = DELETED
+            self._tombstones += 1
+
+        self._keys[slot] = None
+        self._values[slot] = None
+        self._size -= 1
+        return True
+
+    def _find_slot(self, key: str, hash: int) -> int:
+        """
+        Probes the groups for a key starting at its home group. The 16 tags of each group are compared with the
+        key's tag in one step, and only buckets with a matching tag have their stored hash and key compared. The
+        search stops at the first group that has an empty bucket.
+
+        :param key: the key to search for in the HashMap
+        :param hash: the mixed 64-bit hash of the key
+
+        :return: the index of the bucket holding the key, returns None if the key is not found
+        """
+        control, hashes, keys, groups = self._control, self._hashes, self._keys, self._groups
+        tag = hash >> 57
+        group = hash % groups
+
+        for _ in range(groups):
+            start = group * GROUP_WIDTH
+            word = int.from_bytes(control[start:start + GROUP_WIDTH], 'little')
+
+            match = _match_tag(word, tag)
+            while match:
+                bit = match & -match
+                slot = start + (bit.bit_length() >> 3) - 1
+                if hashes[slot] == hash and keys[slot] == key:
+                    return slot
+                match ^= bit
+
+            if _match_empty(word):
+                return None
+            group = (group + 1) % groups
+
+        return None
+
+    @staticmethod
+    def _free_slot(control: bytearray, groups: int, hash: int) -> int:
+        """
+        Probes the groups for a hash until it reaches a group with an empty or deleted bucket.
+
+        :param control: the control tag array to probe
+        :param groups: the number of groups in the array
+        :param hash: the mixed 64-bit hash of the key being placed
+
+        :return: the index of the first bucket in the probe sequence that can take a new entry
+        """
+        group = hash % groups
+        while True:
+            start = group * GROUP_WIDTH
+            free = _match_free(int.from_bytes(control[start:start + GROUP_WIDTH], 'little'))
+            if free:
+                return start + ((free & -free).bit_length() >> 3) - 1
+            group = (group + 1) % groups
+
+    def clear(self) -> None:
+        """
+        Clears the contents of a HashMap object. The underlying capacity of the table is not adjusted.
+
+        :param: None
+
+        :return: no return value
+        """
+        self._control, self._hashes, self._keys, self._values = self._allocate(self._capacity)
+        self._size = 0
+        self._tombstones = 0
+
+    def _hash_many(self, keys: DynamicArray) -> DynamicArray:
+        """
+        Hashes a batch of keys with the HashMap's hash function in a single call, then mixes each hash.
+
+        :param keys: a Dynamic Array of keys to hash
+
+        :return: a Dynamic Array of mixed hash values, in the same order as the keys
+        """
+        hashes = hash_batch(self._hash_function, keys)
+        return DynamicArray([mix_hash(hashes[index], 0) for index in range(hashes.length())])
+
+    def _iter_items(self):
+        """
+        Yields every key/value pair in the HashMap as a tuple, visiting each bucket once and skipping empty and
+        deleted buckets. Nothing is copied, so the HashMap should not be changed while the generator is in use.
+
+        :param: None
+
+        :return: a generator of (key, value) tuples
+        """
+        control, keys, values = self._control, self._keys, self._values
+        for slot in range(self._capacity):
+            if control[slot] < EMPTY:
+                yield keys[slot], values[slot]
+
+    # --------------------- Python mapping protocol -------------------- #
+
+    def __getitem__(self, key: str) -> object:
+        """Return the value for a key using [] syntax, raising KeyError if the key is not found."""
+        slot = self._find_slot(key, self._hash(key))
+        if slot is None:
+            raise KeyError(key)
+        return self._values[slot]
+
+    def __delitem__(self, key: str) -> None:
+        """Remove a key using del syntax, raising KeyError if the key is not found."""
+        if not self._remove_hashed(key, self._hash(key)):
+            raise KeyError(key)